@@ -1,10 +1,11 @@
 import os
-import time
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
 
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from llm_helpers import classify_exception, error_result, is_retryable, run_with_retry
+
 load_dotenv()
 
 
@@ -32,42 +33,9 @@ class HelloAgentsLLM:
 
         self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=timeout)
 
-    @staticmethod
-    def _classify_exception(exc: Exception) -> str:
-        name = exc.__class__.__name__
-        if name == "APITimeoutError":
-            return "timeout"
-        if name == "RateLimitError":
-            return "rate_limit"
-        if name == "APIConnectionError":
-            return "connection_error"
-        if name == "AuthenticationError":
-            return "auth_error"
-        if name == "BadRequestError":
-            return "bad_request"
-        if name == "PermissionDeniedError":
-            return "permission_denied"
-        if name == "NotFoundError":
-            return "not_found"
-        if name == "UnprocessableEntityError":
-            return "unprocessable_entity"
-        if name == "APIStatusError":
-            status_code = getattr(exc, "status_code", None)
-            if isinstance(status_code, int) and status_code >= 500:
-                return "server_error"
-            return "api_status_error"
-        return "unknown_error"
-
-    @staticmethod
-    def _is_retryable(error_type: str) -> bool:
-        return error_type in {
-            "timeout",
-            "rate_limit",
-            "connection_error",
-            "server_error",
-            "empty_response",
-            "unknown_error",
-        }
+    # Kept for callers that used the former per-class helpers.
+    _classify_exception = staticmethod(classify_exception)
+    _is_retryable = staticmethod(is_retryable)
 
     def think_result(
         self,
@@ -76,75 +44,61 @@ class HelloAgentsLLM:
         max_retries: int = 2,
         base_backoff_seconds: float = 0.5,
         stream: bool = True,
+        on_delta: Optional[Callable[[str], None]] = None,
+        on_retry: Optional[Callable[[int], None]] = None,
     ) -> Dict:
-        """Return a unified result payload for robust downstream handling."""
-        last_error = {
-            "ok": False,
-            "content": "",
-            "error_type": "unknown_error",
-            "error_message": "Unknown failure.",
-            "attempts": 0,
-        }
-
-        for attempt in range(1, max_retries + 2):
+        """Return a unified result payload for robust downstream handling.
+
+        ``on_delta`` is called with every streamed content chunk as it arrives.
+        ``on_retry`` is called with the attempt number before a retry starts,
+        so chunks from the failed attempt can be discarded.
+        """
+        attempts_made = 0
+
+        def attempt() -> Dict:
+            nonlocal attempts_made
+            attempts_made += 1
             if self.verbose:
-                print(f"Calling model {self.model} (attempt {attempt}/{max_retries + 1})...")
-            try:
-                response = self.client.chat.completions.create(
-                    model=self.model,
-                    messages=messages,
-                    temperature=temperature,
-                    stream=stream,
+                print(
+                    f"Calling model {self.model} (attempt {attempts_made}/{max_retries + 1})..."
                 )
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=temperature,
+                stream=stream,
+            )
 
-                if stream:
-                    collected_content = []
-                    for chunk in response:
-                        content = chunk.choices[0].delta.content or ""
-                        if self.verbose:
-                            print(content, end="", flush=True)
-                        collected_content.append(content)
+            if stream:
+                collected_content = []
+                for chunk in response:
+                    content = chunk.choices[0].delta.content or ""
                     if self.verbose:
-                        print()
-                    final_content = "".join(collected_content).strip()
-                else:
-                    final_content = (response.choices[0].message.content or "").strip()
-
-                if final_content:
-                    return {
-                        "ok": True,
-                        "content": final_content,
-                        "error_type": None,
-                        "error_message": "",
-                        "attempts": attempt,
-                    }
-
-                last_error = {
-                    "ok": False,
-                    "content": "",
-                    "error_type": "empty_response",
-                    "error_message": "LLM returned empty content.",
-                    "attempts": attempt,
-                }
-            except Exception as exc:  # pragma: no cover - depends on provider/runtime
-                error_type = self._classify_exception(exc)
-                last_error = {
-                    "ok": False,
-                    "content": "",
-                    "error_type": error_type,
-                    "error_message": str(exc),
-                    "attempts": attempt,
-                }
-
-            if attempt <= max_retries and self._is_retryable(last_error["error_type"]):
-                sleep_seconds = base_backoff_seconds * (2 ** (attempt - 1))
-                time.sleep(sleep_seconds)
-
-        return last_error
+                        print(content, end="", flush=True)
+                    if on_delta is not None and content:
+                        on_delta(content)
+                    collected_content.append(content)
+                if self.verbose:
+                    print()
+                final_content = "".join(collected_content).strip()
+            else:
+                final_content = (response.choices[0].message.content or "").strip()
+                if on_delta is not None and final_content:
+                    on_delta(final_content)
+
+            if not final_content:
+                return error_result("empty_response", "LLM returned empty content.")
+            return {"ok": True, "content": final_content, "error_type": None, "error_message": ""}
+
+        return run_with_retry(attempt, max_retries, base_backoff_seconds, on_retry=on_retry)
 
     def think(self, messages: List[Dict[str, str]], temperature: float = 0) -> str:
-        """Backward-compatible interface: return text only."""
-        result = self.think_result(messages=messages, temperature=temperature)
+        """Backward-compatible interface: return text only.
+
+        Makes a single attempt; retrying is left to the caller (``call_llm_safe``
+        or a pipeline ``RetryLayer``), so wrappers never multiply attempts.
+        """
+        result = self.think_result(messages=messages, temperature=temperature, max_retries=0)
         return result["content"] if result["ok"] else ""
 
 
@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from llm_helpers import call_llm_safe
+
+
+def request_key(messages: List[Dict[str, str]], temperature: float = 0) -> str:
+    payload = json.dumps(
+        {"messages": messages, "temperature": temperature},
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class RecordingLLM:
+    """Wraps an LLM client and appends every call to a JSON Lines cassette.
+
+    Each entry stores the request key (hash of messages and temperature), the
+    messages, the result payload, total latency and the streamed chunks of the
+    final attempt with their time offsets. Paths ending in ``.gz`` are
+    gzip-compressed.
+    """
+
+    def __init__(self, llm: Any, path: str):
+        self.llm = llm
+        self.path = path
+        self._lock = threading.Lock()
+
+    def think_result(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0,
+        max_retries: int = 2,
+        base_backoff_seconds: float = 0.5,
+        on_delta: Optional[Callable[[str], None]] = None,
+        on_retry: Optional[Callable[[int], None]] = None,
+        **kwargs: Any,
+    ) -> Dict:
+        chunks = []
+        started = time.perf_counter()
+
+        def capture(delta: str) -> None:
+            chunks.append([round(time.perf_counter() - started, 4), delta])
+            if on_delta is not None:
+                on_delta(delta)
+
+        def restart(attempt: int) -> None:
+            # Chunks of a failed attempt must not be replayed before the answer.
+            chunks.clear()
+            if on_retry is not None:
+                on_retry(attempt)
+
+        result = call_llm_safe(
+            self.llm,
+            messages,
+            temperature=temperature,
+            max_retries=max_retries,
+            base_backoff_seconds=base_backoff_seconds,
+            on_delta=capture,
+            on_retry=restart,
+        )
+        entry = {
+            "key": request_key(messages, temperature),
+            "messages": messages,
+            "temperature": temperature,
+            "result": result,
+            "latency": round(time.perf_counter() - started, 4),
+            "chunks": chunks,
+        }
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            with _open(self.path, "a") as handle:
+                handle.write(line + "\n")
+        return result
+
+    def think(self, messages: List[Dict[str, str]], temperature: float = 0) -> str:
+        result = self.think_result(messages=messages, temperature=temperature)
+        return result["content"] if result["ok"] else ""
+
+
+class ReplayLLM:
+    """Serves recorded cassette entries through the ``think_result`` contract.
+
+    Calls are matched by request key, so concurrency does not change which
+    response a request gets. Repeated identical requests are served in
+    recorded order, and the last entry is reused once they run out. Unknown
+    requests return a non-retryable ``cassette_miss`` error.
+    """
+
+    def __init__(self, path: str, simulate_latency: bool = False):
+        self.path = path
+        self.simulate_latency = simulate_latency
+        self._entries: Dict[str, List[Dict]] = {}
+        self._cursors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+        with _open(path, "r") as handle:
+            for line in handle:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    def __len__(self) -> int:
+        return sum(len(entries) for entries in self._entries.values())
+
+    def _next_entry(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self.stats["misses"] += 1
+                return None
+            cursor = self._cursors.get(key, 0)
+            self._cursors[key] = cursor + 1
+            self.stats["hits"] += 1
+            return entries[min(cursor, len(entries) - 1)]
+
+    def think_result(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0,
+        max_retries: int = 2,
+        base_backoff_seconds: float = 0.5,
+        on_delta: Optional[Callable[[str], None]] = None,
+        **kwargs: Any,
+    ) -> Dict:
+        entry = self._next_entry(request_key(messages, temperature))
+        if entry is None:
+            return {
+                "ok": False,
+                "content": "",
+                "error_type": "cassette_miss",
+                "error_message": "No recorded response for this request.",
+                "attempts": 1,
+            }
+
+        started = time.perf_counter()
+        for offset, delta in entry["chunks"]:
+            if self.simulate_latency:
+                wait = offset - (time.perf_counter() - started)
+                if wait > 0:
+                    time.sleep(wait)
+            if on_delta is not None:
+                on_delta(delta)
+        if self.simulate_latency:
+            remaining = entry["latency"] - (time.perf_counter() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+        return dict(entry["result"])
+
+    def think(self, messages: List[Dict[str, str]], temperature: float = 0) -> str:
+        result = self.think_result(messages=messages, temperature=temperature)
+        return result["content"] if result["ok"] else ""
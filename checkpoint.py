@@ -0,0 +1,49 @@
+import json
+import os
+import re
+import tempfile
+from typing import Any, Dict, Optional
+
+
+def atomic_write_json(path: str, payload: Any) -> None:
+    """Write JSON to ``path`` so readers only ever see the old or the new file."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(payload, handle, ensure_ascii=False)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class CheckpointStore:
+    """Local directory of run checkpoints, one JSON file per run id."""
+
+    def __init__(self, root: str = ".checkpoints"):
+        self.root = root
+
+    def _path(self, run_id: str) -> str:
+        if not re.fullmatch(r"[A-Za-z0-9_.\-]+", run_id or ""):
+            raise ValueError(f"Invalid run id: {run_id!r}")
+        return os.path.join(self.root, f"{run_id}.json")
+
+    def load(self, run_id: str) -> Optional[Dict]:
+        path = self._path(run_id)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as handle:
+            return json.load(handle)
+
+    def save(self, run_id: str, state: Dict) -> None:
+        atomic_write_json(self._path(run_id), state)
+
+    def delete(self, run_id: str) -> None:
+        path = self._path(run_id)
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,178 @@
+import argparse
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from llm_helpers import call_llm_safe
+from modes import run_mode
+from scores import scores_from_result
+from stats import percentile, spearman
+from tokens import estimate_tokens
+
+
+class MeteredLLM:
+    """Counts calls, attempts and estimated tokens for one model run."""
+
+    def __init__(self, llm: Any):
+        self.llm = llm
+        self.calls = 0
+        self.attempts = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def think_result(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0,
+        max_retries: int = 2,
+        base_backoff_seconds: float = 0.5,
+        on_delta: Optional[Callable[[str], None]] = None,
+        on_retry: Optional[Callable[[int], None]] = None,
+        **kwargs: Any,
+    ) -> Dict:
+        result = call_llm_safe(
+            self.llm,
+            messages,
+            temperature=temperature,
+            max_retries=max_retries,
+            base_backoff_seconds=base_backoff_seconds,
+            on_delta=on_delta,
+            on_retry=on_retry,
+        )
+        sent = sum(estimate_tokens(message["content"]) for message in messages)
+        with self._lock:
+            self.calls += 1
+            self.attempts += result["attempts"]
+            # Every attempt resends the prompt; only the final answer is kept.
+            self.prompt_tokens += sent * result["attempts"]
+            self.completion_tokens += estimate_tokens(result["content"])
+        return result
+
+    def think(self, messages: List[Dict[str, str]], temperature: float = 0) -> str:
+        result = self.think_result(messages=messages, temperature=temperature)
+        return result["content"] if result["ok"] else ""
+
+
+def _run_one(llm: Any, mode: str, prompt: str, options: Optional[Dict]) -> Dict:
+    metered = MeteredLLM(llm)
+    started = time.perf_counter()
+    try:
+        result = run_mode(metered, mode, prompt, options)
+        error_type = result.get("error_type")
+    except Exception as exc:
+        result, error_type = {"ok": False}, f"exception: {exc.__class__.__name__}"
+    scores = scores_from_result(result)
+    return {
+        "ok": bool(result.get("ok")),
+        "error_type": error_type,
+        "overall": scores["overall"],
+        "scores": scores,
+        "latency": time.perf_counter() - started,
+        "calls": metered.calls,
+        "attempts": metered.attempts,
+        "prompt_tokens": metered.prompt_tokens,
+        "completion_tokens": metered.completion_tokens,
+        "finished_at": time.perf_counter(),
+    }
+
+
+def compare_models(
+    prompts: Sequence[str],
+    models: Dict[str, Any],
+    mode: str = "basic",
+    options: Optional[Dict] = None,
+    max_workers: int = 4,
+) -> Dict[str, Any]:
+    """Evaluate every prompt with every model concurrently.
+
+    Each model gets its own pool of ``max_workers`` threads, so a slow model
+    does not hold up the others. Returns ``records`` (one per prompt, with an
+    entry per model) and a ``report`` with per-model throughput (prompts per
+    second from the shared start to that model's last finish), latency
+    percentiles, attempts, estimated tokens and pairwise Spearman agreement
+    on ``overall``.
+    """
+    names = list(models)
+    pools = {name: ThreadPoolExecutor(max_workers=max_workers) for name in names}
+    started = time.perf_counter()
+    try:
+        futures = [
+            {
+                name: pools[name].submit(_run_one, models[name], mode, prompt, options)
+                for name in names
+            }
+            for prompt in prompts
+        ]
+        records = [
+            {"prompt": prompt, "models": {name: future.result() for name, future in row.items()}}
+            for prompt, row in zip(prompts, futures)
+        ]
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+
+    report = {"mode": mode, "prompts": len(prompts), "models": {}, "agreement": {}}
+    for name in names:
+        runs = [record["models"][name] for record in records]
+        latencies = [run["latency"] for run in runs]
+        elapsed = max((run["finished_at"] for run in runs), default=started) - started
+        report["models"][name] = {
+            "ok": sum(run["ok"] for run in runs),
+            "throughput_per_second": len(runs) / elapsed if elapsed > 0 else None,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+            "calls": sum(run["calls"] for run in runs),
+            "attempts": sum(run["attempts"] for run in runs),
+            "prompt_tokens": sum(run["prompt_tokens"] for run in runs),
+            "completion_tokens": sum(run["completion_tokens"] for run in runs),
+        }
+
+    for first, second in itertools.combinations(names, 2):
+        pairs = [
+            (record["models"][first]["overall"], record["models"][second]["overall"])
+            for record in records
+        ]
+        # NaN != NaN drops prompts where either model produced no score.
+        pairs = [(x, y) for x, y in pairs if x == x and y == y]
+        report["agreement"][f"{first} vs {second}"] = {
+            "n": len(pairs),
+            "spearman": spearman([x for x, _ in pairs], [y for _, y in pairs]),
+        }
+
+    for record in records:
+        for run in record["models"].values():
+            run.pop("finished_at")
+    return {"records": records, "report": report}
+
+
+def main():
+    from HelloAgentsLLM import HelloAgentsLLM
+
+    parser = argparse.ArgumentParser(description="Compare evaluator models on the same prompts.")
+    parser.add_argument("--models", required=True, help="Comma-separated model ids.")
+    parser.add_argument("--file", required=True, help="Prompts, one per line.")
+    parser.add_argument("--mode", default="basic")
+    parser.add_argument("--output", help="Write records and report as JSON.")
+    args = parser.parse_args()
+
+    with open(args.file, "r", encoding="utf-8") as handle:
+        prompts = [line.strip() for line in handle if line.strip()]
+    models = {
+        name: HelloAgentsLLM(model=name, verbose=False)
+        for name in (item.strip() for item in args.models.split(","))
+        if name
+    }
+    comparison = compare_models(prompts, models, mode=args.mode)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(comparison, handle, ensure_ascii=False, indent=2)
+    print(json.dumps(comparison["report"], ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
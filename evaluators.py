@@ -1,24 +1,82 @@
 import json
 import re
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, Generator, Iterator, List, Optional
 
+from checkpoint import CheckpointStore
 from llm_helpers import call_llm_safe
+from plan_library import DEFAULT_CATEGORY, PlanLibrary
+from prescorer import PreScoreGate
 from prompts import (
     EVALUATION_PROMPT_TEMPLATE,
     EXECUTOR_PROMPT,
     PLANNER_PROMPT,
+    STEP_SUMMARY_PROMPT,
     SYNTHESIS_PROMPT,
 )
+from similarity_index import SimilarityIndex
+from streaming import (
+    FINAL,
+    PLAN_READY,
+    STEP_FINISHED,
+    STEP_STARTED,
+    SYNTHESIS_DELTA,
+    aiter_events,
+    call_llm_streaming,
+    final_result,
+    make_event,
+    run_to_completion,
+)
+from tokens import chunk_text, estimate_tokens, truncate_middle
+
+
+def _reused(hit: Dict) -> Dict:
+    return {**hit["evaluation"], "reused_from": hit["id"], "similarity": hit["similarity"]}
+
+
+def _prescored(pre: Dict) -> Dict:
+    scores = {key: value for key, value in pre.items() if key != "confidence"}
+    return {
+        "ok": True,
+        "content": json.dumps(scores, ensure_ascii=False),
+        "error_type": None,
+        "error_message": "",
+        "attempts": 0,
+        "prescored": True,
+    }
 
 
 class PromptEvaluator:
-    def __init__(self, llm):
+    def __init__(
+        self,
+        llm,
+        similarity_index: Optional[SimilarityIndex] = None,
+        gate: Optional[PreScoreGate] = None,
+    ):
         self.llm = llm
+        self.similarity_index = similarity_index
+        self.gate = gate
 
     def evaluate_result(self, prompt: str) -> Dict:
+        if self.similarity_index is not None:
+            hit = self.similarity_index.lookup(prompt)
+            if hit is not None:
+                return _reused(hit)
+
+        pre = None
+        if self.gate is not None:
+            pre = self.gate.prescore(prompt)
+            if self.gate.decide(pre, mode="basic") == "skip":
+                return _prescored(pre)
+
         prompt_text = EVALUATION_PROMPT_TEMPLATE.format(prompt=prompt)
         messages = [{"role": "user", "content": prompt_text}]
-        return call_llm_safe(self.llm, messages)
+        result = call_llm_safe(self.llm, messages)
+        if result["ok"] and self.similarity_index is not None:
+            self.similarity_index.add(prompt, result)
+        if result["ok"] and pre is not None:
+            self.gate.record_llm(pre, self.parse_json(result["content"]), mode="basic")
+        return result
 
     def evaluate(self, prompt: str) -> str:
         result = self.evaluate_result(prompt)
@@ -50,12 +108,86 @@ class PromptEvaluator:
 
 
 class PlanAndSolveEvaluator:
-    def __init__(self, llm):
+    def __init__(
+        self,
+        llm,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        similarity_index: Optional[SimilarityIndex] = None,
+        gate: Optional[PreScoreGate] = None,
+        token_budget: Optional[int] = None,
+        max_workers: int = 4,
+        max_reduce_rounds: int = 3,
+        plan_library: Optional[PlanLibrary] = None,
+    ):
         self.llm = llm
+        self.checkpoint_store = checkpoint_store
+        self.similarity_index = similarity_index
+        self.gate = gate
+        self.plan_library = plan_library
+        # Estimated input tokens per call; None disables chunking and map-reduce.
+        self.token_budget = token_budget
+        self.max_workers = max_workers
+        self.max_reduce_rounds = max_reduce_rounds
+
+    def _gated_result(self, prompt: str, pre: Dict, decision: str) -> Dict:
+        if decision == "skip":
+            call = _prescored(pre)
+            extra = {"prescored": True}
+        else:
+            call = PromptEvaluator(self.llm).evaluate_result(prompt)
+            extra = {"routed_to": "basic"}
+            if call["ok"]:
+                self.gate.record_llm(
+                    pre,
+                    PromptEvaluator.parse_json(call["content"]),
+                    mode="basic",
+                    routed_from="plan_and_solve",
+                )
+        errors = []
+        if not call["ok"]:
+            errors.append(
+                {
+                    "stage": "basic",
+                    "error_type": call["error_type"],
+                    "error_message": call["error_message"],
+                    "attempts": call["attempts"],
+                }
+            )
+        return {
+            "ok": call["ok"],
+            "error_type": call["error_type"],
+            "error_message": call["error_message"],
+            "plan": "",
+            "step_analyses": "",
+            "final_raw": call["content"],
+            "final_json": PromptEvaluator.parse_json(call["content"]),
+            "errors": errors,
+            **extra,
+        }
+
+    def _load_state(self, run_id: Optional[str], prompt: str) -> Optional[Dict]:
+        if run_id is None or self.checkpoint_store is None:
+            return None
+        state = self.checkpoint_store.load(run_id)
+        if state is None:
+            return {"kind": "plan_and_solve", "prompt": prompt, "plan": None, "steps": {}}
+        if state.get("kind") != "plan_and_solve" or state.get("prompt") != prompt:
+            raise ValueError(f"Checkpoint {run_id!r} belongs to a different run.")
+        return state
+
+    def _save_state(self, run_id: Optional[str], state: Optional[Dict]) -> None:
+        if state is not None:
+            self.checkpoint_store.save(run_id, state)
 
     def plan_result(self, prompt: str) -> Dict:
-        messages = [{"role": "user", "content": PLANNER_PROMPT.format(prompt=prompt)}]
-        return call_llm_safe(self.llm, messages)
+        content = PLANNER_PROMPT.format(prompt=prompt)
+        if not self._fits(content):
+            # The planner only needs the gist of an oversized prompt.
+            overhead = estimate_tokens(PLANNER_PROMPT.format(prompt="")) + 16
+            excerpt = truncate_middle(prompt, max(256, self.token_budget - overhead))
+            content = PLANNER_PROMPT.format(prompt=excerpt)
+        messages = [{"role": "user", "content": content}]
+        return {**call_llm_safe(self.llm, messages), "over_budget": not self._fits(content)}
 
     def plan(self, prompt: str) -> str:
         result = self.plan_result(prompt)
@@ -70,78 +202,267 @@ class PlanAndSolveEvaluator:
         ]
         return numbered or lines
 
-    def execute_result(self, prompt: str, plan: str) -> Dict:
+    @staticmethod
+    def _step_error(step: str, result: Dict) -> Dict:
+        return {
+            "step": step,
+            "error_type": result["error_type"],
+            "error_message": result["error_message"],
+            "attempts": result["attempts"],
+        }
+
+    def _fits(self, text: str) -> bool:
+        return self.token_budget is None or estimate_tokens(text) <= self.token_budget
+
+    def _map_calls(self, contents: List[str]) -> List[Dict]:
+        def call(content: str) -> Dict:
+            return call_llm_safe(self.llm, [{"role": "user", "content": content}])
+
+        if len(contents) == 1:
+            return [call(contents[0])]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(call, contents))
+
+    def _run_step(self, prompt: str, plan: str, step: str) -> Dict:
+        content = EXECUTOR_PROMPT.format(prompt=prompt, plan=plan, step=step)
+        if self._fits(content):
+            result = call_llm_safe(self.llm, [{"role": "user", "content": content}])
+            return {**result, "chunks": 1, "over_budget": False}
+
+        overhead = estimate_tokens(EXECUTOR_PROMPT.format(prompt="", plan=plan, step=step)) + 16
+        parts = chunk_text(prompt, max(256, self.token_budget - overhead))
+        contents = [
+            EXECUTOR_PROMPT.format(
+                prompt=f"[Part {i}/{len(parts)} of the prompt]\n{part}",
+                plan=plan,
+                step=step,
+            )
+            for i, part in enumerate(parts, start=1)
+        ]
+        results = self._map_calls(contents)
+        failed = [result for result in results if not result["ok"]]
+        return {
+            "ok": not failed,
+            "content": "\n\n".join(
+                f"[Part {i}/{len(parts)}]\n{result['content']}"
+                for i, result in enumerate(results, start=1)
+            ),
+            "error_type": failed[0]["error_type"] if failed else None,
+            "error_message": failed[0]["error_message"] if failed else "",
+            "attempts": sum(result["attempts"] for result in results),
+            "chunks": len(parts),
+            # The plan and step alone can leave no room under the budget.
+            "over_budget": not all(self._fits(content) for content in contents),
+        }
+
+    def _reduce_analyses(self, prompt: str, step_analyses: str) -> Dict:
+        """Fit the synthesis input into the token budget by summarizing chunks."""
+        synthesis_prompt = prompt
+        if not self._fits(SYNTHESIS_PROMPT.format(prompt=prompt, step_analyses="")):
+            synthesis_prompt = truncate_middle(prompt, self.token_budget // 4)
+
+        analyses = step_analyses
+        rounds = 0
+        errors = []
+        over_budget = False
+        chunk_budget = None
+        if self.token_budget is not None:
+            overhead = estimate_tokens(STEP_SUMMARY_PROMPT.format(step_analyses=""))
+            chunk_budget = max(256, self.token_budget - overhead)
+        while rounds < self.max_reduce_rounds and not self._fits(
+            SYNTHESIS_PROMPT.format(prompt=synthesis_prompt, step_analyses=analyses)
+        ):
+            rounds += 1
+            chunks = chunk_text(analyses, chunk_budget)
+            contents = [STEP_SUMMARY_PROMPT.format(step_analyses=chunk) for chunk in chunks]
+            over_budget = over_budget or not all(self._fits(content) for content in contents)
+            results = self._map_calls(contents)
+            for result in results:
+                if not result["ok"]:
+                    errors.append(
+                        {
+                            "stage": "map",
+                            "error_type": result["error_type"],
+                            "error_message": result["error_message"],
+                            "attempts": result["attempts"],
+                        }
+                    )
+            analyses = "\n\n".join(result["content"] for result in results if result["ok"])
+
+        # Reduce rounds can run out before the synthesis input fits.
+        synthesis_fits = self._fits(
+            SYNTHESIS_PROMPT.format(prompt=synthesis_prompt, step_analyses=analyses)
+        )
+        return {
+            "prompt": synthesis_prompt,
+            "step_analyses": analyses,
+            "path": "map_reduce" if rounds else "direct",
+            "rounds": rounds,
+            "errors": errors,
+            "map_over_budget": over_budget,
+            "synthesis_over_budget": not synthesis_fits,
+        }
+
+    def _iter_execute(
+        self,
+        prompt: str,
+        plan: str,
+        run_id: Optional[str] = None,
+        state: Optional[Dict] = None,
+    ) -> Generator[Dict, None, Dict]:
         steps = self._extract_steps(plan)
         history = []
         errors = []
+        prompt_chunks = 1
+        over_budget = False
 
-        for step in steps:
-            messages = [
-                {
-                    "role": "user",
-                    "content": EXECUTOR_PROMPT.format(prompt=prompt, plan=plan, step=step),
-                }
-            ]
-            result = call_llm_safe(self.llm, messages)
+        for index, step in enumerate(steps):
+            yield make_event(STEP_STARTED, index=index, total=len(steps), step=step)
+            done = state["steps"].get(str(index)) if state is not None else None
+            if done is not None:
+                result = {"ok": True, "content": done, "error_type": None, "error_message": ""}
+            else:
+                result = self._run_step(prompt, plan, step)
+                prompt_chunks = max(prompt_chunks, result["chunks"])
+                over_budget = over_budget or result["over_budget"]
+                if result["ok"] and state is not None:
+                    state["steps"][str(index)] = result["content"]
+                    self._save_state(run_id, state)
             history.append(f"{step}\n{result['content']}")
             if not result["ok"]:
-                errors.append(
-                    {
-                        "step": step,
-                        "error_type": result["error_type"],
-                        "error_message": result["error_message"],
-                        "attempts": result["attempts"],
-                    }
-                )
+                errors.append(self._step_error(step, result))
+            yield make_event(
+                STEP_FINISHED,
+                index=index,
+                total=len(steps),
+                step=step,
+                ok=result["ok"],
+                analysis=result["content"],
+            )
 
         return {
             "ok": len(errors) == 0,
             "content": "\n\n".join(history),
             "errors": errors,
+            "prompt_chunks": prompt_chunks,
+            "over_budget": over_budget,
         }
 
+    def execute_result(self, prompt: str, plan: str, run_id: Optional[str] = None) -> Dict:
+        state = self._load_state(run_id, prompt)
+        if state is not None and state["plan"] != plan:
+            state.update({"plan": plan, "steps": {}})
+        return run_to_completion(self._iter_execute(prompt, plan, run_id, state))
+
     def execute(self, prompt: str, plan: str) -> str:
         result = self.execute_result(prompt, plan)
         return result["content"]
 
-    def evaluate(self, prompt: str) -> Dict:
-        plan_call = self.plan_result(prompt)
+    def evaluate_stream(
+        self, prompt: str, run_id: Optional[str] = None, category: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """Yield progress events; the last one is ``final`` with the ``evaluate`` dict.
+
+        With a ``checkpoint_store`` and ``run_id``, the plan, each successful step
+        analysis and the final result are checkpointed; a rerun with the same id
+        continues after the last finished stage.
+
+        With a ``plan_library``, the plan stored for the prompt's ``category``
+        (classified from the prompt when not given) replaces the planner call.
+        """
+        return self._iter_evaluate(prompt, run_id, category, stream=True)
+
+    def _iter_evaluate(
+        self, prompt: str, run_id: Optional[str], category: Optional[str], stream: bool
+    ) -> Iterator[Dict]:
+        # Without a stream consumer, synthesis is a plain call: no delta thread.
+        state = self._load_state(run_id, prompt)
+        if state is not None and "result" in state:
+            yield make_event(FINAL, result=state["result"])
+            return
+
+        if self.similarity_index is not None:
+            hit = self.similarity_index.lookup(prompt)
+            if hit is not None:
+                yield make_event(FINAL, result=_reused(hit))
+                return
+
+        pre = None
+        if self.gate is not None and not (state is not None and state["plan"]):
+            pre = self.gate.prescore(prompt)
+            decision = self.gate.decide(pre, mode="plan_and_solve")
+            if decision != "llm":
+                yield make_event(FINAL, result=self._gated_result(prompt, pre, decision))
+                return
+
+        library = self.plan_library
+        if library is not None and category is None:
+            category = library.classify(prompt)
+            if category == DEFAULT_CATEGORY:
+                # Unrelated prompts without a keyword match share no plan.
+                library = None
+        plan_source = "planner"
+        if state is not None and state["plan"]:
+            plan_call = {"ok": True, "content": state["plan"]}
+            plan_source = "checkpoint"
+        else:
+            stored = library.get(category) if library is not None else None
+            if stored is not None:
+                plan_call = {"ok": True, "content": stored}
+                plan_source = "library"
+            else:
+                plan_call = self.plan_result(prompt)
+            if plan_call["ok"] and state is not None:
+                state["plan"] = plan_call["content"]
+                self._save_state(run_id, state)
         plan_text = plan_call["content"]
 
         if not plan_call["ok"]:
-            return {
-                "ok": False,
-                "error_type": plan_call["error_type"],
-                "error_message": plan_call["error_message"],
-                "plan": "",
-                "step_analyses": "",
-                "final_raw": "",
-                "final_json": {},
-                "errors": [
-                    {
-                        "stage": "plan",
-                        "error_type": plan_call["error_type"],
-                        "error_message": plan_call["error_message"],
-                        "attempts": plan_call["attempts"],
-                    }
-                ],
-            }
+            yield make_event(
+                FINAL,
+                result={
+                    "ok": False,
+                    "error_type": plan_call["error_type"],
+                    "error_message": plan_call["error_message"],
+                    "plan": "",
+                    "step_analyses": "",
+                    "final_raw": "",
+                    "final_json": {},
+                    "errors": [
+                        {
+                            "stage": "plan",
+                            "error_type": plan_call["error_type"],
+                            "error_message": plan_call["error_message"],
+                            "attempts": plan_call["attempts"],
+                        }
+                    ],
+                },
+            )
+            return
+
+        yield make_event(
+            PLAN_READY, plan=plan_text, steps=self._extract_steps(plan_text), source=plan_source
+        )
 
-        execute_call = self.execute_result(prompt, plan_text)
+        execute_call = yield from self._iter_execute(prompt, plan_text, run_id, state)
         step_analyses = execute_call["content"]
+        reduced = self._reduce_analyses(prompt, step_analyses)
         final_messages = [
             {
                 "role": "user",
                 "content": SYNTHESIS_PROMPT.format(
-                    prompt=prompt,
-                    step_analyses=step_analyses,
+                    prompt=reduced["prompt"],
+                    step_analyses=reduced["step_analyses"],
                 ),
             }
         ]
-        final_call = call_llm_safe(self.llm, final_messages)
+        if stream:
+            final_call = yield from call_llm_streaming(self.llm, final_messages, SYNTHESIS_DELTA)
+        else:
+            final_call = call_llm_safe(self.llm, final_messages)
         final_raw = final_call["content"]
 
-        errors = list(execute_call["errors"])
+        errors = list(execute_call["errors"]) + reduced["errors"]
         if not final_call["ok"]:
             errors.append(
                 {
@@ -152,7 +473,18 @@ class PlanAndSolveEvaluator:
                 }
             )
 
-        return {
+        # Calls that were sent even though no chunking could fit them in the budget.
+        over_budget_stages = [
+            stage
+            for stage, over in (
+                ("plan", plan_call.get("over_budget", False)),
+                ("step", execute_call["over_budget"]),
+                ("map", reduced["map_over_budget"]),
+                ("synthesis", reduced["synthesis_over_budget"]),
+            )
+            if over
+        ]
+        result = {
             "ok": len(errors) == 0,
             "error_type": errors[0]["error_type"] if errors else None,
             "error_message": errors[0]["error_message"] if errors else "",
@@ -161,4 +493,33 @@ class PlanAndSolveEvaluator:
             "final_raw": final_raw,
             "final_json": PromptEvaluator.parse_json(final_raw),
             "errors": errors,
+            "synthesis_path": reduced["path"],
+            "reduce_rounds": reduced["rounds"],
+            "prompt_chunks": execute_call["prompt_chunks"],
+            "over_budget": bool(over_budget_stages),
+            "over_budget_stages": over_budget_stages,
+            "plan_source": plan_source,
+            "plan_category": category,
         }
+        if result["ok"] and plan_source == "planner" and library is not None:
+            # Only plans that carried a run through to a clean result are kept.
+            library.put(category, plan_text)
+        if result["ok"] and state is not None:
+            state["result"] = result
+            self._save_state(run_id, state)
+        if result["ok"] and self.similarity_index is not None:
+            self.similarity_index.add(prompt, result)
+        if result["ok"] and pre is not None:
+            calls = int(plan_source == "planner") + 1 + len(self._extract_steps(plan_text))
+            self.gate.record_llm(pre, result["final_json"], mode="plan_and_solve", calls=calls)
+        yield make_event(FINAL, result=result)
+
+    def aevaluate_stream(
+        self, prompt: str, run_id: Optional[str] = None, category: Optional[str] = None
+    ) -> AsyncIterator[Dict]:
+        return aiter_events(self.evaluate_stream(prompt, run_id, category))
+
+    def evaluate(
+        self, prompt: str, run_id: Optional[str] = None, category: Optional[str] = None
+    ) -> Dict:
+        return final_result(self._iter_evaluate(prompt, run_id, category, stream=False))
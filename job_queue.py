@@ -0,0 +1,181 @@
+import json
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from modes import MODES, normalize_options
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mode TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_expires);
+"""
+
+STATUSES = ("pending", "leased", "done", "failed")
+
+
+class JobQueue:
+    """Durable SQLite job queue with worker leases and bounded retries.
+
+    A job is leased to one worker at a time. Leases that expire (crashed or
+    stuck workers) are claimable again until ``max_attempts`` is used up.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = 600.0, max_attempts: int = 3):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _transaction(self):
+        with closing(sqlite3.connect(self.path, timeout=30, isolation_level=None)) as conn:
+            conn.row_factory = sqlite3.Row
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["options"] = json.loads(job["options"] or "{}")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, mode: str, prompt: str, options: Optional[Dict] = None) -> int:
+        return self.enqueue_many([{"mode": mode, "prompt": prompt, "options": options}])[0]
+
+    def enqueue_many(self, jobs: Iterable[Dict]) -> List[int]:
+        ids = []
+        now = time.time()
+        with self._transaction() as conn:
+            for job in jobs:
+                if job["mode"] not in MODES:
+                    raise ValueError(f"Unknown mode: {job['mode']!r}.")
+                # Reject bad options now rather than failing every worker attempt.
+                options = normalize_options(job["mode"], job.get("options"))
+                cursor = conn.execute(
+                    "INSERT INTO jobs (mode, prompt, options, created_at) VALUES (?, ?, ?, ?)",
+                    (job["mode"], job["prompt"], json.dumps(options), now),
+                )
+                ids.append(cursor.lastrowid)
+        return ids
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Lease the oldest available job to ``worker_id``, or return None."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'lease expired', finished_at = ? "
+                "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ?) ORDER BY id LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, worker = ?, "
+                "lease_expires = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, row["id"]),
+            )
+            job = conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+        return self._row_to_job(job)
+
+    def extend_lease(self, job_id: int, worker_id: str) -> bool:
+        """Renew the lease for another ``lease_seconds``; False if it was lost."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'leased' AND worker = ?",
+                (time.time() + self.lease_seconds, job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def complete(self, job_id: int, worker_id: str, result: Dict) -> bool:
+        """Store the result; returns False if the lease was lost to another worker."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, finished_at = ? "
+                "WHERE id = ? AND status = 'leased' AND worker = ?",
+                (json.dumps(result, ensure_ascii=False), time.time(), job_id, worker_id),
+            )
+        return cursor.rowcount == 1
+
+    def fail(
+        self,
+        job_id: int,
+        worker_id: str,
+        error: str,
+        result: Optional[Dict] = None,
+        retryable: bool = True,
+    ) -> bool:
+        """Return the job to the queue, or mark it failed once attempts are used up.
+
+        A non-``retryable`` failure is marked failed right away.
+        """
+        payload = json.dumps(result, ensure_ascii=False) if result is not None else None
+        last_attempt = self.max_attempts if retryable else 0
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET "
+                "status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "finished_at = CASE WHEN attempts >= ? THEN ? ELSE NULL END, "
+                "error = ?, result = ?, lease_expires = NULL "
+                "WHERE id = ? AND status = 'leased' AND worker = ?",
+                (
+                    last_attempt,
+                    last_attempt,
+                    time.time(),
+                    error,
+                    payload,
+                    job_id,
+                    worker_id,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def summary(self, window_seconds: float = 60.0) -> Dict[str, Any]:
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+            counts = {row[0]: row[1] for row in rows}
+            recent = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'done' AND finished_at >= ?",
+                (now - window_seconds,),
+            ).fetchone()[0]
+            retried = conn.execute("SELECT COUNT(*) FROM jobs WHERE attempts > 1").fetchone()[0]
+        return {
+            "counts": {status: counts.get(status, 0) for status in STATUSES},
+            "total": sum(counts.values()),
+            "retried": retried,
+            "completed_in_window": recent,
+            "window_seconds": window_seconds,
+            "throughput_per_second": recent / window_seconds if window_seconds else 0.0,
+        }
@@ -1,8 +1,9 @@
+import inspect
 import time
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
 
-def _classify_exception(exc: Exception) -> str:
+def classify_exception(exc: Exception) -> str:
     name = exc.__class__.__name__
     if name == "APITimeoutError":
         return "timeout"
@@ -28,7 +29,7 @@ def _classify_exception(exc: Exception) -> str:
     return "unknown_error"
 
 
-def _is_retryable(error_type: str) -> bool:
+def is_retryable(error_type: str) -> bool:
     return error_type in {
         "timeout",
         "rate_limit",
@@ -39,6 +40,62 @@ def _is_retryable(error_type: str) -> bool:
     }
 
 
+def error_result(error_type: str, error_message: str, attempts: int = 1) -> Dict[str, Any]:
+    return {
+        "ok": False,
+        "content": "",
+        "error_type": error_type,
+        "error_message": error_message,
+        "attempts": attempts,
+    }
+
+
+def run_with_retry(
+    attempt: Callable[[], Dict[str, Any]],
+    max_retries: int = 2,
+    base_backoff_seconds: float = 0.5,
+    sleep: Callable[[float], None] = time.sleep,
+    on_retry: Optional[Callable[[int], None]] = None,
+) -> Dict[str, Any]:
+    """Run ``attempt`` up to ``max_retries + 1`` times with exponential backoff.
+
+    ``attempt`` returns a result payload or raises; exceptions are classified.
+    Non-retryable errors end the loop immediately. ``on_retry`` is called with
+    the attempt number before every attempt after the first.
+    """
+    last_error = error_result("unknown_error", "Unknown failure.", attempts=0)
+
+    for attempt_number in range(1, max_retries + 2):
+        if attempt_number > 1 and on_retry is not None:
+            on_retry(attempt_number)
+        try:
+            result = attempt()
+        except Exception as exc:  # pragma: no cover - depends on runtime/provider
+            result = error_result(classify_exception(exc), str(exc))
+        result = {**result, "attempts": attempt_number}
+        if result["ok"]:
+            return result
+
+        last_error = result
+        if attempt_number > max_retries or not is_retryable(last_error["error_type"]):
+            break
+        sleep(base_backoff_seconds * (2 ** (attempt_number - 1)))
+
+    return last_error
+
+
+def accepts_kwarg(fn: Callable, name: str) -> bool:
+    """Whether ``fn`` can be called with keyword argument ``name``."""
+    try:
+        parameters = inspect.signature(fn).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    return any(
+        parameter.name == name or parameter.kind is inspect.Parameter.VAR_KEYWORD
+        for parameter in parameters
+    )
+
+
 def _normalize_result(result: Dict[str, Any]) -> Dict[str, Any]:
     return {
         "ok": bool(result.get("ok", False)),
@@ -55,55 +112,43 @@ def call_llm_safe(
     temperature: float = 0,
     max_retries: int = 2,
     base_backoff_seconds: float = 0.5,
+    on_delta: Optional[Callable[[str], None]] = None,
+    on_retry: Optional[Callable[[int], None]] = None,
 ) -> Dict[str, Any]:
-    """Unified safe LLM call with retry and error classification."""
+    """Unified safe LLM call with retry and error classification.
+
+    ``on_delta`` receives content chunks as they stream in. Clients that only
+    implement ``think()`` deliver the whole successful answer as one chunk.
+    ``on_retry`` is called with the attempt number before a retry, so deltas
+    received so far can be discarded. Hooks are only passed to a client's
+    ``think_result`` if it accepts them; otherwise a successful answer is
+    delivered to ``on_delta`` as one chunk.
+    """
     if hasattr(llm, "think_result") and callable(getattr(llm, "think_result")):
-        result = llm.think_result(
-            messages=messages,
-            temperature=temperature,
-            max_retries=max_retries,
-            base_backoff_seconds=base_backoff_seconds,
+        kwargs = {}
+        if on_delta is not None and accepts_kwarg(llm.think_result, "on_delta"):
+            kwargs["on_delta"] = on_delta
+        if on_retry is not None and accepts_kwarg(llm.think_result, "on_retry"):
+            kwargs["on_retry"] = on_retry
+        result = _normalize_result(
+            llm.think_result(
+                messages=messages,
+                temperature=temperature,
+                max_retries=max_retries,
+                base_backoff_seconds=base_backoff_seconds,
+                **kwargs,
+            )
         )
-        return _normalize_result(result)
+        if on_delta is not None and "on_delta" not in kwargs and result["ok"]:
+            on_delta(result["content"])
+        return result
 
-    last_error = {
-        "ok": False,
-        "content": "",
-        "error_type": "unknown_error",
-        "error_message": "Unknown failure",
-        "attempts": 0,
-    }
+    def attempt() -> Dict[str, Any]:
+        content = llm.think(messages) or ""
+        if not content.strip():
+            return error_result("empty_response", "LLM returned empty response.")
+        if on_delta is not None:
+            on_delta(content)
+        return {"ok": True, "content": content, "error_type": None, "error_message": ""}
 
-    for attempt in range(1, max_retries + 2):
-        try:
-            content = llm.think(messages) or ""
-            if content.strip():
-                return {
-                    "ok": True,
-                    "content": content,
-                    "error_type": None,
-                    "error_message": "",
-                    "attempts": attempt,
-                }
-            last_error = {
-                "ok": False,
-                "content": "",
-                "error_type": "empty_response",
-                "error_message": "LLM returned empty response.",
-                "attempts": attempt,
-            }
-        except Exception as exc:  # pragma: no cover - depends on runtime/provider
-            error_type = _classify_exception(exc)
-            last_error = {
-                "ok": False,
-                "content": "",
-                "error_type": error_type,
-                "error_message": str(exc),
-                "attempts": attempt,
-            }
-
-        if attempt <= max_retries and _is_retryable(last_error["error_type"]):
-            sleep_seconds = base_backoff_seconds * (2 ** (attempt - 1))
-            time.sleep(sleep_seconds)
-
-    return last_error
+    return run_with_retry(attempt, max_retries, base_backoff_seconds, on_retry=on_retry)
@@ -0,0 +1,45 @@
+from typing import Any, Dict, Optional
+
+from evaluators import PlanAndSolveEvaluator, PromptEvaluator
+from reflection_agent import ReflectionPromptAgent
+
+MODES = ("basic", "plan_and_solve", "reflection")
+
+# Integer options per mode: name -> (default, minimum).
+_INT_OPTIONS = {"reflection": {"max_iterations": (2, 1), "target_overall": (8, 0)}}
+
+
+def normalize_options(mode: str, options: Optional[Dict] = None) -> Dict:
+    """Return ``options`` with defaults filled in; raise ``ValueError`` if invalid."""
+    options = dict(options or {})
+    for name, (default, minimum) in _INT_OPTIONS.get(mode, {}).items():
+        value = options.get(name, default)
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError(f"Option {name!r} must be an integer.")
+        try:
+            value = int(value)
+        except ValueError:
+            raise ValueError(f"Option {name!r} must be an integer.") from None
+        if value < minimum:
+            raise ValueError(f"Option {name!r} must be at least {minimum}.")
+        options[name] = value
+    return options
+
+
+def run_mode(llm: Any, mode: str, prompt: str, options: Optional[Dict] = None) -> Dict:
+    """Run one evaluation mode and return a JSON-serializable result dict."""
+    options = normalize_options(mode, options)
+    if mode == "basic":
+        evaluator = PromptEvaluator(llm)
+        result = evaluator.evaluate_result(prompt)
+        return {**result, "json": evaluator.parse_json(result["content"])}
+    if mode == "plan_and_solve":
+        return PlanAndSolveEvaluator(llm).evaluate(prompt)
+    if mode == "reflection":
+        agent = ReflectionPromptAgent(
+            llm,
+            max_iterations=options["max_iterations"],
+            target_overall=options["target_overall"],
+        )
+        return agent.run(prompt)
+    raise ValueError(f"Unknown mode: {mode!r}. Expected one of {', '.join(MODES)}.")
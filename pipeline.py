@@ -0,0 +1,358 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, List, Optional
+
+from cassette import request_key
+from llm_helpers import call_llm_safe, classify_exception, error_result, run_with_retry
+from scheduler import LLMScheduler
+from stats import percentile
+
+Handler = Callable[[Dict[str, Any]], Dict[str, Any]]
+
+
+class Transport:
+    """Bare, single-attempt call to an LLM client. Never retries."""
+
+    name = "transport"
+
+    def __init__(self, llm: Any):
+        self.llm = llm
+
+    def __call__(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        result = call_llm_safe(
+            self.llm,
+            request["messages"],
+            temperature=request.get("temperature", 0),
+            max_retries=0,
+            on_delta=request.get("on_delta"),
+        )
+        return {**result, "attempts": 1}
+
+
+class Layer:
+    """Base class for pipeline layers; override ``handle``."""
+
+    name = "layer"
+
+    def handle(self, request: Dict[str, Any], call_next: Handler) -> Dict[str, Any]:
+        return call_next(request)
+
+
+class RetryLayer(Layer):
+    """The only place attempts are bounded: at most ``max_attempts`` transport calls."""
+
+    name = "retry"
+
+    def __init__(self, max_attempts: int = 3, base_backoff_seconds: float = 0.5):
+        self.max_attempts = max_attempts
+        self.base_backoff_seconds = base_backoff_seconds
+
+    def handle(self, request, call_next):
+        return run_with_retry(
+            lambda: call_next(request),
+            max_retries=self.max_attempts - 1,
+            base_backoff_seconds=self.base_backoff_seconds,
+            on_retry=request.get("on_retry"),
+        )
+
+
+class CacheLayer(Layer):
+    """LRU cache of successful results for deterministic (temperature 0) requests."""
+
+    name = "cache"
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def handle(self, request, call_next):
+        if request.get("temperature", 0) != 0:
+            return call_next(request)
+        key = request_key(request["messages"], 0)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+        if cached is not None:
+            if request.get("on_delta") is not None:
+                request["on_delta"](cached["content"])
+            return {**cached, "cached": True}
+
+        result = call_next(request)
+        if result["ok"]:
+            with self._lock:
+                self._entries[key] = result
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return result
+
+
+class DedupLayer(Layer):
+    """Coalesces identical in-flight requests into one downstream call."""
+
+    name = "dedup"
+
+    def __init__(self):
+        self._in_flight: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"coalesced": 0}
+
+    def handle(self, request, call_next):
+        key = request_key(request["messages"], request.get("temperature", 0))
+        with self._lock:
+            slot = self._in_flight.get(key)
+            leader = slot is None
+            if leader:
+                slot = {"done": threading.Event(), "result": None}
+                self._in_flight[key] = slot
+            else:
+                self.stats["coalesced"] += 1
+
+        if not leader:
+            slot["done"].wait()
+            result = slot["result"]
+            if result["ok"] and request.get("on_delta") is not None:
+                request["on_delta"](result["content"])
+            return {**result, "deduplicated": True}
+
+        try:
+            result = call_next(request)
+            slot["result"] = result
+            return result
+        except BaseException as exc:
+            slot["result"] = error_result(classify_exception(exc), str(exc))
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            slot["done"].set()
+
+
+class RateLimitLayer(Layer):
+    """Token bucket: ``rate_per_second`` sustained with bursts up to ``burst``."""
+
+    name = "rate_limit"
+
+    def __init__(self, rate_per_second: float, burst: int = 1):
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated) * self.rate_per_second
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_per_second
+            time.sleep(wait)
+
+    def handle(self, request, call_next):
+        self._acquire()
+        return call_next(request)
+
+
+class SchedulerLayer(Layer):
+    """Runs each downstream call in an ``LLMScheduler`` slot.
+
+    A request's ``priority`` and ``tenant`` keys override the layer defaults.
+    Place it below ``RetryLayer`` so backoff sleeps do not hold a slot.
+    """
+
+    name = "scheduler"
+
+    def __init__(self, scheduler: LLMScheduler, priority: str = "default", tenant: str = "default"):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.tenant = tenant
+
+    def handle(self, request, call_next):
+        return self.scheduler.run(
+            lambda: call_next(request),
+            request.get("priority") or self.priority,
+            request.get("tenant") or self.tenant,
+        )
+
+
+class MetricsLayer(Layer):
+    """Counts calls, errors, attempts and latency as seen from this layer."""
+
+    name = "metrics"
+
+    def __init__(self, max_samples: int = 10_000):
+        self._latencies = deque(maxlen=max_samples)
+        self._lock = threading.Lock()
+        self._counts = {"calls": 0, "ok": 0, "attempts": 0, "errors": {}}
+
+    def handle(self, request, call_next):
+        started = time.perf_counter()
+        result = call_next(request)
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self._latencies.append(elapsed)
+            self._counts["calls"] += 1
+            self._counts["attempts"] += result.get("attempts", 1)
+            if result["ok"]:
+                self._counts["ok"] += 1
+            else:
+                errors = self._counts["errors"]
+                errors[result["error_type"]] = errors.get(result["error_type"], 0) + 1
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self._latencies)
+            counts = {**self._counts, "errors": dict(self._counts["errors"])}
+        return {
+            **counts,
+            "latency_p50": percentile(latencies, 50),
+            "latency_p95": percentile(latencies, 95),
+        }
+
+
+class TracingLayer(Layer):
+    """Emits one span dict per call to ``sink`` (default: a bounded in-memory list)."""
+
+    name = "tracing"
+
+    def __init__(self, sink: Optional[Callable[[Dict], None]] = None, max_spans: int = 1000):
+        self.spans = deque(maxlen=max_spans)
+        self.sink = sink or self.spans.append
+
+    def handle(self, request, call_next):
+        started = time.time()
+        result = call_next(request)
+        self.sink(
+            {
+                "key": request_key(request["messages"], request.get("temperature", 0))[:16],
+                "started": started,
+                "duration": time.time() - started,
+                "ok": result["ok"],
+                "error_type": result.get("error_type"),
+                "attempts": result.get("attempts", 1),
+            }
+        )
+        return result
+
+
+class LLMPipeline:
+    """Stack of layers around a bare transport, usable anywhere an ``llm`` is.
+
+    ``layers`` are listed outermost first. Retrying belongs to ``RetryLayer``
+    alone: the ``max_retries`` passed by ``call_llm_safe`` is ignored.
+    ``layer_stats()`` reports each layer's own wall time, excluding the layers
+    below it.
+    """
+
+    # Wrappers such as ScheduledLLM must not add a retry loop around this client.
+    owns_retries = True
+
+    def __init__(self, transport: Any, layers: Optional[List[Layer]] = None):
+        # Plain LLM clients get wrapped; any other callable is used as the transport.
+        is_client = hasattr(transport, "think") or hasattr(transport, "think_result")
+        if is_client and not isinstance(transport, Transport):
+            transport = Transport(transport)
+        self.transport = transport
+        self.layers = list(layers or [])
+        self._names = [layer.name for layer in self.layers]
+        self._names.append(getattr(transport, "name", "transport"))
+        self._inclusive = [0.0] * len(self._names)
+        self._calls = [0] * len(self._names)
+        self._stats_lock = threading.Lock()
+        self._handler = self._build()
+
+    def _timed(self, index: int, handler: Handler) -> Handler:
+        def timed(request):
+            started = time.perf_counter()
+            try:
+                return handler(request)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._stats_lock:
+                    self._inclusive[index] += elapsed
+                    self._calls[index] += 1
+
+        return timed
+
+    def _build(self) -> Handler:
+        handler = self._timed(len(self.layers), self.transport)
+        for index in range(len(self.layers) - 1, -1, -1):
+            layer = self.layers[index]
+            handler = self._timed(
+                index, lambda request, layer=layer, inner=handler: layer.handle(request, inner)
+            )
+        return handler
+
+    def layer_stats(self) -> List[Dict[str, Any]]:
+        with self._stats_lock:
+            inclusive = list(self._inclusive)
+            calls = list(self._calls)
+        stats = []
+        for index, name in enumerate(self._names):
+            downstream = inclusive[index + 1] if index + 1 < len(inclusive) else 0.0
+            own = max(0.0, inclusive[index] - downstream)
+            stats.append(
+                {
+                    "layer": name,
+                    "calls": calls[index],
+                    "overhead_seconds": own,
+                    "avg_overhead_ms": own / calls[index] * 1000 if calls[index] else 0.0,
+                }
+            )
+        return stats
+
+    def think_result(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0,
+        max_retries: int = 0,
+        base_backoff_seconds: float = 0,
+        on_delta: Optional[Callable[[str], None]] = None,
+        on_retry: Optional[Callable[[int], None]] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        request = {
+            "messages": messages,
+            "temperature": temperature,
+            "on_delta": on_delta,
+            "on_retry": on_retry,
+        }
+        # Routing hints for layers such as SchedulerLayer.
+        request.update({key: kwargs[key] for key in ("priority", "tenant") if key in kwargs})
+        return self._handler(request)
+
+    def think(self, messages: List[Dict[str, str]], temperature: float = 0) -> str:
+        result = self.think_result(messages=messages, temperature=temperature)
+        return result["content"] if result["ok"] else ""
+
+
+def default_pipeline(
+    llm: Any,
+    max_attempts: int = 3,
+    base_backoff_seconds: float = 0.5,
+    rate_per_second: Optional[float] = None,
+    cache_entries: int = 1024,
+) -> LLMPipeline:
+    """metrics -> cache -> dedup -> retry -> [rate limit] -> transport."""
+    layers: List[Layer] = [
+        MetricsLayer(),
+        CacheLayer(cache_entries),
+        DedupLayer(),
+        RetryLayer(max_attempts, base_backoff_seconds),
+    ]
+    if rate_per_second:
+        layers.append(RateLimitLayer(rate_per_second, burst=max(1, int(rate_per_second))))
+    return LLMPipeline(Transport(llm), layers)
@@ -0,0 +1,117 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+from checkpoint import atomic_write_json
+
+# Keyword classifier: the category with the most keyword hits wins.
+CATEGORY_KEYWORDS = {
+    "code_gen": [
+        "code", "function", "python", "javascript", "implement", "script", "sql",
+        "class", "algorithm", "program", "refactor", "bug",
+    ],
+    "summarization": ["summarize", "summary", "summarise", "tl;dr", "condense", "key points"],
+    "extraction": ["extract", "parse", "pull out", "entities", "fields", "field", "schema"],
+    "translation": ["translate", "translation", "into english", "into chinese", "into french"],
+    "classification": ["classify", "categorize", "label", "sentiment", "category", "tag"],
+    "qa": ["answer", "question", "faq", "explain why", "what is", "how does"],
+    "writing": ["article", "essay", "email", "story", "blog", "post", "copy", "write"],
+}
+DEFAULT_CATEGORY = "general"
+
+
+def classify_prompt(prompt: str) -> str:
+    text = prompt.lower()
+    best, best_hits = DEFAULT_CATEGORY, 0
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        hits = sum(len(re.findall(r"(?<!\w)" + re.escape(word) + r"(?!\w)", text)) for word in keywords)
+        if hits > best_hits:
+            best, best_hits = category, hits
+    return best
+
+
+class PlanLibrary:
+    """Evaluation plans keyed by prompt category, reused to skip the planner.
+
+    A stored plan goes stale after ``max_age_seconds`` or after ``max_uses``
+    reuses. A stale plan counts as a miss, so the next planner output
+    replaces it. Use counts are kept in memory and written on ``put``,
+    ``refresh`` or ``flush``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_age_seconds: Optional[float] = None,
+        max_uses: Optional[int] = None,
+    ):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.max_uses = max_uses
+        self._plans: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "stores": 0}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as handle:
+                self._plans = json.load(handle)
+
+    def classify(self, prompt: str) -> str:
+        return classify_prompt(prompt)
+
+    def _is_stale(self, entry: Dict, now: float) -> bool:
+        if self.max_age_seconds is not None and now - entry["created_at"] > self.max_age_seconds:
+            return True
+        return self.max_uses is not None and entry["uses"] >= self.max_uses
+
+    def _save(self) -> None:
+        if self.path:
+            atomic_write_json(self.path, self._plans)
+
+    def get(self, category: str) -> Optional[str]:
+        with self._lock:
+            entry = self._plans.get(category)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            if self._is_stale(entry, time.time()):
+                self._stats["stale"] += 1
+                self._stats["misses"] += 1
+                return None
+            entry["uses"] += 1
+            self._stats["hits"] += 1
+            return entry["plan"]
+
+    def put(self, category: str, plan: str) -> None:
+        with self._lock:
+            self._plans[category] = {"plan": plan, "created_at": time.time(), "uses": 0}
+            self._stats["stores"] += 1
+            self._save()
+
+    def refresh(self, category: Optional[str] = None) -> int:
+        """Drop ``category`` (or every stale plan) so the planner regenerates it."""
+        with self._lock:
+            if category is not None:
+                removed = [category] if category in self._plans else []
+            else:
+                now = time.time()
+                removed = [name for name, entry in self._plans.items() if self._is_stale(entry, now)]
+            for name in removed:
+                del self._plans[name]
+            if removed:
+                self._save()
+            return len(removed)
+
+    def flush(self) -> None:
+        """Persist in-memory use counts."""
+        with self._lock:
+            self._save()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            entries = len(self._plans)
+        lookups = stats["hits"] + stats["misses"]
+        return {**stats, "entries": entries, "hit_rate": stats["hits"] / lookups if lookups else 0.0}
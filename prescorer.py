@@ -0,0 +1,170 @@
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+from stats import pearson
+
+DIMENSIONS = ("clarity", "specificity", "constraints", "format_definition")
+
+_FORMAT = re.compile(
+    r"\b(json|yaml|xml|csv|markdown|table|bullet(?: points?)?|(?:numbered )?list|schema|"
+    r"format|return only|respond with|one per line|output)\b",
+    re.IGNORECASE,
+)
+_SCHEMA = re.compile(r"[{\[]\s*\"?\w+\"?\s*:|```")
+_CONSTRAINT = re.compile(
+    r"\b(must|should|do not|don't|never|only|at most|at least|no more than|exactly|"
+    r"avoid|limit(?:ed)?|within|without|required?)\b",
+    re.IGNORECASE,
+)
+_EXAMPLE = re.compile(r"\b(for example|e\.g\.|for instance|example|input:|output:)", re.IGNORECASE)
+_ROLE = re.compile(r"\b(you are|act as|as an? )\b", re.IGNORECASE)
+_NUMBER = re.compile(r"\b\d+\b")
+
+
+def _clip(value: float) -> float:
+    return round(min(10.0, max(1.0, float(value))), 1)
+
+
+def prescore(prompt: str) -> Dict:
+    """Estimate the ``EVALUATION_PROMPT_TEMPLATE`` scores from cheap text features."""
+    words = len(prompt.split())
+    sentences = len([part for part in re.split(r"[.!?\n]+", prompt) if part.strip()])
+    has_format = bool(_FORMAT.search(prompt))
+    has_schema = bool(_SCHEMA.search(prompt))
+    constraints = len(_CONSTRAINT.findall(prompt))
+    has_example = bool(_EXAMPLE.search(prompt))
+    has_role = bool(_ROLE.search(prompt))
+    numbers = len(_NUMBER.findall(prompt))
+
+    scores = {
+        "clarity": _clip(3 + min(3.0, words / 10) + 1.5 * has_role + min(1.5, sentences / 2)),
+        "specificity": _clip(
+            2 + min(3.0, words / 15) + min(2.0, numbers) + 1.5 * has_example + has_schema
+        ),
+        "constraints": _clip(2 + 1.5 * min(constraints, 5)),
+        "format_definition": _clip(2 + 3.5 * has_format + 2.5 * has_schema + 1.5 * has_example),
+    }
+    overall = round(sum(scores.values()) / len(scores), 1)
+
+    problems = []
+    if words < 8:
+        problems.append("prompt is very short")
+    if not has_format:
+        problems.append("no output format specified")
+    if not constraints:
+        problems.append("no explicit constraints")
+    if not has_example:
+        problems.append("no examples")
+
+    return {
+        **scores,
+        "overall": overall,
+        # Extreme estimates are the ones the heuristics get right most often.
+        "confidence": round(min(1.0, abs(overall - 5.5) / 3.5), 2),
+        "problems": "; ".join(problems) or "none detected by heuristics",
+        "improvement_suggestions": "Address: " + "; ".join(problems) if problems else "",
+    }
+
+
+def prescore_batch(prompts: Iterable[str]) -> List[Dict]:
+    return [prescore(prompt) for prompt in prompts]
+
+
+class PreScoreGate:
+    """Decides whether a prompt needs an LLM evaluation, and tracks the savings.
+
+    Decisions:
+        ``skip``  confident pre-score at or below ``skip_below`` / at or above ``skip_above``
+        ``basic`` confident enough to downgrade Plan-and-Solve to a single basic call
+        ``llm``   run the requested mode unchanged
+    """
+
+    def __init__(
+        self,
+        skip_below: float = 3.0,
+        skip_above: float = 8.5,
+        min_confidence: float = 0.7,
+        basic_confidence: float = 0.4,
+        default_plan_and_solve_calls: int = 6,
+    ):
+        self.skip_below = skip_below
+        self.skip_above = skip_above
+        self.min_confidence = min_confidence
+        self.basic_confidence = basic_confidence
+        self.default_plan_and_solve_calls = default_plan_and_solve_calls
+        self._lock = threading.Lock()
+        self._decisions = Counter()
+        self._calls_avoided = 0
+        self._plan_and_solve_calls: List[int] = []
+        self._pairs: List[tuple] = []
+
+    def prescore(self, prompt: str) -> Dict:
+        return prescore(prompt)
+
+    def _plan_and_solve_cost(self) -> float:
+        observed = self._plan_and_solve_calls
+        return sum(observed) / len(observed) if observed else self.default_plan_and_solve_calls
+
+    def decide(self, pre: Dict, mode: str = "basic") -> str:
+        confident = pre["confidence"] >= self.min_confidence
+        if confident and (pre["overall"] <= self.skip_below or pre["overall"] >= self.skip_above):
+            decision = "skip"
+        elif mode == "plan_and_solve" and pre["confidence"] >= self.basic_confidence:
+            decision = "basic"
+        else:
+            decision = "llm"
+
+        with self._lock:
+            self._decisions[f"{mode}:{decision}"] += 1
+            if decision == "skip":
+                cost = self._plan_and_solve_cost() if mode == "plan_and_solve" else 1
+                self._calls_avoided += cost
+        return decision
+
+    def record_llm(
+        self,
+        pre: Dict,
+        llm_scores: Dict,
+        mode: str = "basic",
+        calls: int = 1,
+        routed_from: Optional[str] = None,
+    ) -> None:
+        """Remember an LLM score next to its pre-score for the agreement report.
+
+        ``routed_from="plan_and_solve"`` marks a successful ``basic`` route; only
+        then are the Plan-and-Solve calls it replaced counted as avoided.
+        """
+        with self._lock:
+            self._pairs.append((pre, llm_scores))
+            if mode == "plan_and_solve":
+                self._plan_and_solve_calls.append(calls)
+            if routed_from == "plan_and_solve":
+                self._calls_avoided += self._plan_and_solve_cost() - calls
+
+    def report(self) -> Dict:
+        with self._lock:
+            pairs = list(self._pairs)
+            decisions = dict(self._decisions)
+            calls_avoided = self._calls_avoided
+
+        agreement = {}
+        for dimension in DIMENSIONS + ("overall",):
+            xs, ys = [], []
+            for pre, scores in pairs:
+                try:
+                    ys.append(float(scores.get(dimension)))
+                except (TypeError, ValueError):
+                    continue
+                xs.append(pre[dimension])
+            agreement[dimension] = {
+                "n": len(xs),
+                "mae": sum(abs(x - y) for x, y in zip(xs, ys)) / len(xs) if xs else None,
+                "pearson": pearson(xs, ys),
+            }
+        return {
+            "decisions": decisions,
+            "calls_avoided": round(calls_avoided, 1),
+            "agreement": agreement,
+        }
@@ -78,6 +78,18 @@ Now provide a final scoring result strictly in JSON:
 }}
 """
 
+# 摘要模板（Plan-and-Solve 长输入的 map 阶段）
+# 作用：分步分析超出 token 预算时，先分块压缩，再交给综合模板。
+STEP_SUMMARY_PROMPT = """
+You are condensing part of a multi-step prompt evaluation.
+
+Step Analyses:
+{step_analyses}
+
+Summarize these analyses. Keep every concrete problem, strength, score-relevant
+finding and improvement suggestion, grouped by step. Return only the summary.
+"""
+
 # 反思模板（Reflection 阶段）
 # 作用：判断上一轮评估是否可靠。
 REFLECTION_PROMPT = """
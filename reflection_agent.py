@@ -1,8 +1,19 @@
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Iterator, Optional
 
 from evaluators import PromptEvaluator
+from checkpoint import CheckpointStore
 from llm_helpers import call_llm_safe
+from prescorer import PreScoreGate
 from prompts import REFINE_PROMPT, REFLECTION_PROMPT
+from streaming import (
+    FINAL,
+    ITERATION_SCORED,
+    PROMPT_REFINED,
+    REFLECTION_READY,
+    aiter_events,
+    final_result,
+    make_event,
+)
 
 
 class Memory:
@@ -20,11 +31,20 @@ class Memory:
 
 
 class ReflectionPromptAgent:
-    def __init__(self, llm, max_iterations: int = 2, target_overall: int = 8):
+    def __init__(
+        self,
+        llm,
+        max_iterations: int = 2,
+        target_overall: int = 8,
+        checkpoint_store: Optional[CheckpointStore] = None,
+        gate: Optional[PreScoreGate] = None,
+    ):
         self.llm = llm
         self.memory = Memory()
         self.max_iterations = max_iterations
         self.target_overall = target_overall
+        self.checkpoint_store = checkpoint_store
+        self.gate = gate
 
     @staticmethod
     def _safe_overall(evaluation_json: Dict) -> Optional[float]:
@@ -36,8 +56,51 @@ class ReflectionPromptAgent:
         except (TypeError, ValueError):
             return None
 
-    def run(self, prompt: str) -> Dict:
-        evaluator = PromptEvaluator(self.llm)
+    def _load_state(self, run_id: Optional[str], prompt: str) -> Optional[Dict]:
+        if run_id is None or self.checkpoint_store is None:
+            return None
+        state = self.checkpoint_store.load(run_id)
+        if state is None:
+            # A new run must not checkpoint records left over from earlier runs.
+            self.memory = Memory()
+            return {
+                "kind": "reflection",
+                "prompt": prompt,
+                "memory": self.memory.records,
+                "stages": {},
+            }
+        if state.get("kind") != "reflection" or state.get("prompt") != prompt:
+            raise ValueError(f"Checkpoint {run_id!r} belongs to a different run.")
+        self.memory.records = state["memory"]
+        return state
+
+    def _cached(self, state: Optional[Dict], iteration: int, stage: str):
+        if state is None:
+            return None
+        index = state["stages"].get(f"{iteration}:{stage}")
+        return None if index is None else self.memory.records[index]["content"]
+
+    def _record(
+        self,
+        state: Optional[Dict],
+        run_id: Optional[str],
+        iteration: int,
+        stage: str,
+        content: Dict,
+    ):
+        self.memory.add(stage, content)
+        if state is not None and content["call"]["ok"]:
+            state["stages"][f"{iteration}:{stage}"] = len(self.memory.records) - 1
+            self.checkpoint_store.save(run_id, state)
+
+    def run_stream(self, prompt: str, run_id: Optional[str] = None) -> Iterator[Dict]:
+        """Yield progress events; the last one is ``final`` with the ``run`` dict.
+
+        With a ``checkpoint_store`` and ``run_id``, every successful stage is
+        checkpointed and a rerun with the same id replays it without an LLM call.
+        """
+        state = self._load_state(run_id, prompt)
+        evaluator = PromptEvaluator(self.llm, gate=self.gate)
         current_prompt = prompt
         final_feedback = ""
         iterations = 0
@@ -48,18 +111,19 @@ class ReflectionPromptAgent:
         for i in range(self.max_iterations):
             iterations = i + 1
 
-            evaluation_call = evaluator.evaluate_result(current_prompt)
-            evaluation_raw = evaluation_call["content"]
-            evaluation_json = evaluator.parse_json(evaluation_raw)
-            self.memory.add(
-                "evaluation",
-                {
+            evaluation = self._cached(state, iterations, "evaluation")
+            if evaluation is None:
+                evaluation_call = evaluator.evaluate_result(current_prompt)
+                evaluation = {
                     "prompt": current_prompt,
-                    "raw": evaluation_raw,
-                    "json": evaluation_json,
+                    "raw": evaluation_call["content"],
+                    "json": evaluator.parse_json(evaluation_call["content"]),
                     "call": evaluation_call,
-                },
-            )
+                }
+                self._record(state, run_id, iterations, "evaluation", evaluation)
+            evaluation_call = evaluation["call"]
+            evaluation_raw = evaluation["raw"]
+            evaluation_json = evaluation["json"]
 
             if not evaluation_call["ok"]:
                 ok = False
@@ -69,6 +133,13 @@ class ReflectionPromptAgent:
                 break
 
             overall = self._safe_overall(evaluation_json)
+            yield make_event(
+                ITERATION_SCORED,
+                iteration=iterations,
+                prompt=current_prompt,
+                overall=overall,
+                evaluation=evaluation_json,
+            )
             if overall is not None and overall >= self.target_overall:
                 final_feedback = "Target score reached."
                 break
@@ -77,9 +148,13 @@ class ReflectionPromptAgent:
                 prompt=current_prompt,
                 evaluation=evaluation_raw,
             )
-            feedback_call = call_llm_safe(self.llm, [{"role": "user", "content": reflection_text}])
-            feedback = feedback_call["content"]
-            self.memory.add("reflection", {"text": feedback, "call": feedback_call})
+            reflection = self._cached(state, iterations, "reflection")
+            if reflection is None:
+                feedback_call = call_llm_safe(self.llm, [{"role": "user", "content": reflection_text}])
+                reflection = {"text": feedback_call["content"], "call": feedback_call}
+                self._record(state, run_id, iterations, "reflection", reflection)
+            feedback_call = reflection["call"]
+            feedback = reflection["text"]
             final_feedback = feedback
 
             if not feedback_call["ok"]:
@@ -89,13 +164,19 @@ class ReflectionPromptAgent:
                 final_feedback = f"Reflection failed: {error_type}"
                 break
 
+            yield make_event(REFLECTION_READY, iteration=iterations, feedback=feedback)
+
             if "Evaluation is reliable." in feedback and overall is not None:
                 break
 
             refine_text = REFINE_PROMPT.format(prompt=current_prompt, feedback=feedback)
-            refine_call = call_llm_safe(self.llm, [{"role": "user", "content": refine_text}])
-            improved_prompt = refine_call["content"]
-            self.memory.add("refined_prompt", {"text": improved_prompt, "call": refine_call})
+            refined = self._cached(state, iterations, "refined_prompt")
+            if refined is None:
+                refine_call = call_llm_safe(self.llm, [{"role": "user", "content": refine_text}])
+                refined = {"text": refine_call["content"], "call": refine_call}
+                self._record(state, run_id, iterations, "refined_prompt", refined)
+            refine_call = refined["call"]
+            improved_prompt = refined["text"]
 
             if not refine_call["ok"]:
                 ok = False
@@ -107,16 +188,26 @@ class ReflectionPromptAgent:
             if not improved_prompt.strip():
                 break
             current_prompt = improved_prompt.strip()
+            yield make_event(PROMPT_REFINED, iteration=iterations, prompt=current_prompt)
 
         final_evaluation = self.memory.last("evaluation") or {}
-        return {
-            "ok": ok,
-            "error_type": error_type,
-            "error_message": error_message,
-            "final_prompt": current_prompt,
-            "final_evaluation_raw": final_evaluation.get("raw", ""),
-            "final_evaluation_json": final_evaluation.get("json", {}),
-            "final_feedback": final_feedback,
-            "iterations": iterations,
-            "memory": self.memory.records,
-        }
+        yield make_event(
+            FINAL,
+            result={
+                "ok": ok,
+                "error_type": error_type,
+                "error_message": error_message,
+                "final_prompt": current_prompt,
+                "final_evaluation_raw": final_evaluation.get("raw", ""),
+                "final_evaluation_json": final_evaluation.get("json", {}),
+                "final_feedback": final_feedback,
+                "iterations": iterations,
+                "memory": self.memory.records,
+            },
+        )
+
+    def arun_stream(self, prompt: str, run_id: Optional[str] = None) -> AsyncIterator[Dict]:
+        return aiter_events(self.run_stream(prompt, run_id))
+
+    def run(self, prompt: str, run_id: Optional[str] = None) -> Dict:
+        return final_result(self.run_stream(prompt, run_id))
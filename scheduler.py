@@ -0,0 +1,213 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, TypeVar
+
+from llm_helpers import call_llm_safe, run_with_retry
+from stats import percentile
+
+PRIORITY_CLASSES = ("interactive", "default", "batch")
+
+T = TypeVar("T")
+
+
+class LLMScheduler:
+    """Admits at most ``max_concurrency`` LLM calls at a time, best class first.
+
+    ``classes`` are listed highest priority first. Within a class, tenants
+    are served round-robin, one call each. A waiting call gains one priority
+    class per ``aging_seconds`` spent queued, so batch work still drains
+    under sustained interactive load.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        aging_seconds: float = 10.0,
+        classes: Sequence[str] = PRIORITY_CLASSES,
+        max_samples: int = 1000,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1.")
+        self.max_concurrency = max_concurrency
+        self.aging_seconds = aging_seconds
+        self.classes = tuple(classes)
+        self._rank = {name: index for index, name in enumerate(self.classes)}
+        # class -> tenant -> waiting tickets; tenant order is the round-robin order.
+        self._queues: Dict[str, "OrderedDict[str, deque]"] = {
+            name: OrderedDict() for name in self.classes
+        }
+        self._in_flight = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            name: {
+                "submitted": 0,
+                "completed": 0,
+                "aged": 0,
+                "waits": deque(maxlen=max_samples),
+            }
+            for name in self.classes
+        }
+
+    def _oldest(self, name: str) -> Optional[float]:
+        tenants = self._queues[name]
+        return min((queue[0]["enqueued"] for queue in tenants.values()), default=None)
+
+    def _pick_locked(self, now: float) -> Optional[Dict]:
+        best, best_rank = None, None
+        for name in self.classes:
+            oldest = self._oldest(name)
+            if oldest is None:
+                continue
+            rank = self._rank[name]
+            if self.aging_seconds:
+                rank -= (now - oldest) / self.aging_seconds
+            if best_rank is None or rank < best_rank:
+                best, best_rank = name, rank
+        if best is None:
+            return None
+
+        if any(self._queues[name] for name in self.classes[: self._rank[best]]):
+            self._stats[best]["aged"] += 1
+        tenants = self._queues[best]
+        tenant, queue = next(iter(tenants.items()))
+        ticket = queue.popleft()
+        if queue:
+            tenants.move_to_end(tenant)
+        else:
+            del tenants[tenant]
+        return ticket
+
+    def _dispatch_locked(self) -> None:
+        now = time.monotonic()
+        while self._in_flight < self.max_concurrency:
+            ticket = self._pick_locked(now)
+            if ticket is None:
+                return
+            self._in_flight += 1
+            self._stats[ticket["priority"]]["waits"].append(now - ticket["enqueued"])
+            ticket["granted"].set()
+
+    def acquire(self, priority: str = "default", tenant: str = "default") -> None:
+        if priority not in self._rank:
+            raise ValueError(
+                f"Unknown priority: {priority!r}. Expected one of {', '.join(self.classes)}."
+            )
+        ticket = {"priority": priority, "enqueued": time.monotonic(), "granted": threading.Event()}
+        with self._lock:
+            self._stats[priority]["submitted"] += 1
+            self._queues[priority].setdefault(tenant, deque()).append(ticket)
+            self._dispatch_locked()
+        ticket["granted"].wait()
+
+    def release(self, priority: str = "default") -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._stats[priority]["completed"] += 1
+            self._dispatch_locked()
+
+    @contextmanager
+    def slot(self, priority: str = "default", tenant: str = "default") -> Iterator[None]:
+        self.acquire(priority, tenant)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def run(self, fn: Callable[[], T], priority: str = "default", tenant: str = "default") -> T:
+        with self.slot(priority, tenant):
+            return fn()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            classes = {}
+            for name in self.classes:
+                stats = self._stats[name]
+                tenants = self._queues[name]
+                waits = list(stats["waits"])
+                oldest = self._oldest(name)
+                classes[name] = {
+                    "queued": sum(len(queue) for queue in tenants.values()),
+                    "queued_by_tenant": {tenant: len(queue) for tenant, queue in tenants.items()},
+                    "oldest_wait": now - oldest if oldest is not None else 0.0,
+                    "submitted": stats["submitted"],
+                    "completed": stats["completed"],
+                    "aged": stats["aged"],
+                    "wait_p50": percentile(waits, 50),
+                    "wait_p95": percentile(waits, 95),
+                }
+            in_flight = self._in_flight
+        return {"max_concurrency": self.max_concurrency, "in_flight": in_flight, "classes": classes}
+
+
+class ScheduledLLM:
+    """LLM client whose calls go through ``scheduler`` as ``priority``/``tenant``.
+
+    Each attempt is scheduled separately, so retry backoff does not hold a slot.
+    A client that bounds its own attempts (``owns_retries``, e.g. ``LLMPipeline``)
+    is called once per slot and is not retried again; put ``SchedulerLayer``
+    inside such a pipeline to schedule its attempts individually.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        scheduler: LLMScheduler,
+        priority: str = "default",
+        tenant: str = "default",
+    ):
+        self.llm = llm
+        self.scheduler = scheduler
+        self.priority = priority
+        self.tenant = tenant
+
+    def scoped(self, priority: Optional[str] = None, tenant: Optional[str] = None) -> "ScheduledLLM":
+        """Same client and scheduler under another priority class or tenant."""
+        return ScheduledLLM(
+            self.llm,
+            self.scheduler,
+            priority=priority or self.priority,
+            tenant=tenant or self.tenant,
+        )
+
+    def think_result(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0,
+        max_retries: int = 2,
+        base_backoff_seconds: float = 0.5,
+        on_delta: Optional[Callable[[str], None]] = None,
+        on_retry: Optional[Callable[[int], None]] = None,
+        **kwargs: Any,
+    ) -> Dict[str, Any]:
+        if getattr(self.llm, "owns_retries", False):
+            return self.scheduler.run(
+                lambda: call_llm_safe(
+                    self.llm,
+                    messages,
+                    temperature=temperature,
+                    max_retries=max_retries,
+                    base_backoff_seconds=base_backoff_seconds,
+                    on_delta=on_delta,
+                    on_retry=on_retry,
+                ),
+                self.priority,
+                self.tenant,
+            )
+
+        def attempt() -> Dict[str, Any]:
+            return self.scheduler.run(
+                lambda: call_llm_safe(
+                    self.llm, messages, temperature=temperature, max_retries=0, on_delta=on_delta
+                ),
+                self.priority,
+                self.tenant,
+            )
+
+        return run_with_retry(attempt, max_retries, base_backoff_seconds, on_retry=on_retry)
+
+    def think(self, messages: List[Dict[str, str]], temperature: float = 0) -> str:
+        result = self.think_result(messages=messages, temperature=temperature)
+        return result["content"] if result["ok"] else ""
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import os
+import time
+import warnings
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from checkpoint import atomic_write_json
+from scores import DIMENSIONS, scores_from_result
+
+_COLUMNS = {
+    "prompt_id": np.uint64,
+    "run": np.uint32,
+    "timestamp": np.float64,
+    **{dimension: np.float32 for dimension in DIMENSIONS},
+}
+
+
+def prompt_id(prompt: str) -> int:
+    """Stable 64-bit id for a prompt text."""
+    digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class ScoreStore:
+    """Append-only columnar store of evaluation scores.
+
+    Each column is a raw little-endian file under ``root`` that is read back
+    with ``np.memmap``. Runs (model, template version, ...) are registered in
+    ``runs.json`` and referenced from rows by a small integer id. The committed
+    row count in ``rows.json`` is written last, so bytes left by an interrupted
+    append are ignored and then overwritten by the next one.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self._runs_path = os.path.join(root, "runs.json")
+        self._rows_path = os.path.join(root, "rows.json")
+        self._runs: List[Dict[str, Any]] = []
+        if os.path.exists(self._runs_path):
+            with open(self._runs_path, "r", encoding="utf-8") as handle:
+                self._runs = json.load(handle)
+
+    def _column_path(self, name: str) -> str:
+        return os.path.join(self.root, f"{name}.bin")
+
+    def runs(self) -> List[Dict[str, Any]]:
+        return list(self._runs)
+
+    def run_id(self, name: str, create: bool = False, metadata: Optional[Dict] = None) -> int:
+        for run in self._runs:
+            if run["name"] == name:
+                return run["id"]
+        if not create:
+            raise KeyError(f"Unknown run: {name!r}")
+        run = {"id": len(self._runs), "name": name, "created_at": time.time(), **(metadata or {})}
+        self._runs.append(run)
+        atomic_write_json(self._runs_path, self._runs)
+        return run["id"]
+
+    def append(
+        self,
+        run: str,
+        prompts: Sequence[str],
+        scores: Sequence[Dict],
+        metadata: Optional[Dict] = None,
+    ) -> int:
+        """Append one row per prompt. ``scores`` may be score dicts or full results."""
+        if len(prompts) != len(scores):
+            raise ValueError("prompts and scores must have the same length.")
+        run_index = self.run_id(run, create=True, metadata=metadata)
+        rows = [scores_from_result(item) for item in scores]
+        columns = {
+            "prompt_id": [prompt_id(prompt) for prompt in prompts],
+            "run": [run_index] * len(rows),
+            "timestamp": [time.time()] * len(rows),
+            **{dimension: [row[dimension] for row in rows] for dimension in DIMENSIONS},
+        }
+        committed = len(self)
+        for name, dtype in _COLUMNS.items():
+            with open(self._column_path(name), "ab") as handle:
+                # Drop any tail an interrupted append left past the committed rows.
+                handle.truncate(committed * np.dtype(dtype).itemsize)
+                handle.write(np.asarray(columns[name], dtype=dtype).tobytes())
+        atomic_write_json(self._rows_path, {"rows": committed + len(rows)})
+        return len(rows)
+
+    def __len__(self) -> int:
+        if not os.path.exists(self._rows_path):
+            return 0
+        with open(self._rows_path, "r", encoding="utf-8") as handle:
+            return json.load(handle)["rows"]
+
+    def column(self, name: str) -> np.ndarray:
+        """Memory-mapped, read-only view of one column."""
+        length = len(self)
+        if length == 0:
+            return np.empty(0, dtype=_COLUMNS[name])
+        return np.memmap(self._column_path(name), dtype=_COLUMNS[name], mode="r", shape=(length,))
+
+    def _matrix(self, run: Optional[str] = None) -> np.ndarray:
+        matrix = np.stack([self.column(dimension) for dimension in DIMENSIONS], axis=1)
+        if run is not None:
+            matrix = matrix[self.column("run") == self.run_id(run)]
+        return matrix
+
+    def percentiles(
+        self, run: Optional[str] = None, q: Iterable[float] = (50, 90, 99)
+    ) -> Dict[str, Dict[float, float]]:
+        q = list(q)
+        matrix = self._matrix(run)
+        if len(matrix) == 0:
+            return {dimension: {p: float("nan") for p in q} for dimension in DIMENSIONS}
+        with warnings.catch_warnings():
+            # Dimensions with no scores yield NaN rather than a warning.
+            warnings.simplefilter("ignore", RuntimeWarning)
+            values = np.nanpercentile(matrix, q, axis=0)
+        return {
+            dimension: {p: float(values[i, j]) for i, p in enumerate(q)}
+            for j, dimension in enumerate(DIMENSIONS)
+        }
+
+    def drift(self, run_a: str, run_b: str) -> Dict[str, Dict[str, float]]:
+        """Per-dimension change in mean and median from ``run_a`` to ``run_b``."""
+        a = self._matrix(run_a)
+        b = self._matrix(run_b)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            mean_a, mean_b = np.nanmean(a, axis=0), np.nanmean(b, axis=0)
+            median_a, median_b = np.nanmedian(a, axis=0), np.nanmedian(b, axis=0)
+        return {
+            dimension: {
+                "mean_a": float(mean_a[j]),
+                "mean_b": float(mean_b[j]),
+                "delta_mean": float(mean_b[j] - mean_a[j]),
+                "delta_median": float(median_b[j] - median_a[j]),
+            }
+            for j, dimension in enumerate(DIMENSIONS)
+        }
+
+    def _latest_by_prompt(self, run: str, dimension: str):
+        mask = self.column("run") == self.run_id(run)
+        ids = np.asarray(self.column("prompt_id")[mask])[::-1]
+        values = np.asarray(self.column(dimension)[mask])[::-1]
+        unique_ids, first = np.unique(ids, return_index=True)
+        return unique_ids, values[first]
+
+    def regressions(
+        self, run_a: str, run_b: str, dimension: str = "overall", top: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Prompts whose latest score dropped the most from ``run_a`` to ``run_b``."""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"Unknown dimension: {dimension!r}")
+        ids_a, values_a = self._latest_by_prompt(run_a, dimension)
+        ids_b, values_b = self._latest_by_prompt(run_b, dimension)
+        common, index_a, index_b = np.intersect1d(
+            ids_a, ids_b, assume_unique=True, return_indices=True
+        )
+        delta = values_b[index_b] - values_a[index_a]
+        valid = ~np.isnan(delta) & (delta < 0)
+        common, delta = common[valid], delta[valid]
+        index_a, index_b = index_a[valid], index_b[valid]
+        if len(delta) > top:
+            order = np.argpartition(delta, top)[:top]
+        else:
+            order = np.arange(len(delta))
+        order = order[np.argsort(delta[order], kind="stable")]
+        return [
+            {
+                "prompt_id": int(common[i]),
+                "before": float(values_a[index_a[i]]),
+                "after": float(values_b[index_b[i]]),
+                "delta": float(delta[i]),
+            }
+            for i in order
+        ]
@@ -0,0 +1,18 @@
+from typing import Dict
+
+DIMENSIONS = ("clarity", "specificity", "constraints", "format_definition", "overall")
+
+
+def scores_from_result(result: Dict) -> Dict[str, float]:
+    """Pull the score dict out of any evaluator/agent result; missing scores become NaN."""
+    for key in ("final_json", "final_evaluation_json", "json"):
+        if isinstance(result.get(key), dict):
+            result = result[key]
+            break
+    scores = {}
+    for dimension in DIMENSIONS:
+        try:
+            scores[dimension] = float(result.get(dimension))
+        except (TypeError, ValueError):
+            scores[dimension] = float("nan")
+    return scores
@@ -0,0 +1,313 @@
+import argparse
+import asyncio
+import json
+import signal
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from modes import MODES, normalize_options, run_mode
+from scheduler import LLMScheduler, ScheduledLLM
+from stats import percentile
+
+DEFAULT_MODE_LIMITS = {"basic": 8, "plan_and_solve": 4, "reflection": 2}
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class EvaluationServer:
+    """Asyncio JSON-over-HTTP front end for the three evaluation modes.
+
+    Endpoints:
+        POST /evaluate/<mode>  body ``{"prompt": str, "options": dict}``
+        GET  /health
+        GET  /metrics
+
+    Requests beyond ``max_queue`` waiting for a mode slot are rejected with 429.
+    With a ``scheduler``, LLM calls run under ``options.priority`` (default
+    ``interactive``) and ``options.tenant``.
+    """
+
+    def __init__(
+        self,
+        llm: Any,
+        host: str = "127.0.0.1",
+        port: int = 8080,
+        max_queue: int = 64,
+        mode_limits: Optional[Dict[str, int]] = None,
+        max_body_bytes: int = 1_000_000,
+        scheduler: Optional[LLMScheduler] = None,
+    ):
+        self.llm = llm
+        self.host = host
+        self.port = port
+        self.max_queue = max_queue
+        self.mode_limits = {**DEFAULT_MODE_LIMITS, **(mode_limits or {})}
+        self.max_body_bytes = max_body_bytes
+        self.scheduler = scheduler
+
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._executor = ThreadPoolExecutor(max_workers=sum(self.mode_limits.values()))
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._tasks = set()
+        self._draining = False
+        self._queued = 0
+        self._stats = {
+            mode: {
+                "requests": 0,
+                "completed": 0,
+                "failed": 0,
+                "rejected": 0,
+                "in_flight": 0,
+                "latencies": deque(maxlen=1000),
+            }
+            for mode in MODES
+        }
+
+    async def start(self) -> None:
+        self._semaphores = {mode: asyncio.Semaphore(self.mode_limits[mode]) for mode in MODES}
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        try:
+            await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    async def shutdown(self, timeout: float = 30.0) -> None:
+        """Stop accepting connections and wait for in-flight runs to finish."""
+        self._draining = True
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._tasks:
+            await asyncio.wait(self._tasks, timeout=timeout)
+        self._executor.shutdown(wait=False)
+
+    def metrics(self) -> Dict:
+        modes = {}
+        for mode, stats in self._stats.items():
+            latencies = list(stats["latencies"])
+            modes[mode] = {
+                "requests": stats["requests"],
+                "completed": stats["completed"],
+                "failed": stats["failed"],
+                "rejected": stats["rejected"],
+                "in_flight": stats["in_flight"],
+                "limit": self.mode_limits[mode],
+                "latency_p50": percentile(latencies, 50),
+                "latency_p95": percentile(latencies, 95),
+            }
+        metrics = {
+            "draining": self._draining,
+            "queued": self._queued,
+            "max_queue": self.max_queue,
+            "modes": modes,
+        }
+        if self.scheduler is not None:
+            metrics["scheduler"] = self.scheduler.stats()
+        return metrics
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        try:
+            status, payload = await self._dispatch(reader)
+        except Exception as exc:  # pragma: no cover - defensive
+            status, payload = 500, {"error": "internal_error", "error_message": str(exc)}
+        finally:
+            self._tasks.discard(task)
+
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n"
+        )
+        try:
+            writer.write(head.encode("ascii") + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        parts = request_line.split()
+        if len(parts) != 3:
+            raise ValueError("Malformed request line.")
+        method, path, _ = parts
+
+        content_length = 0
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            if name.strip().lower() == "content-length":
+                content_length = int(value.strip())
+        if content_length > self.max_body_bytes:
+            raise OverflowError("Request body too large.")
+        body = await reader.readexactly(content_length) if content_length else b""
+        return method, path.split("?", 1)[0], body
+
+    async def _dispatch(self, reader: asyncio.StreamReader) -> Tuple[int, Dict]:
+        try:
+            method, path, body = await self._read_request(reader)
+        except OverflowError as exc:
+            return 413, {"error": "payload_too_large", "error_message": str(exc)}
+        except (ValueError, asyncio.IncompleteReadError) as exc:
+            return 400, {"error": "bad_request", "error_message": str(exc)}
+
+        if path == "/health":
+            return (503 if self._draining else 200), {
+                "status": "draining" if self._draining else "ok"
+            }
+        if path == "/metrics":
+            return 200, self.metrics()
+        if not path.startswith("/evaluate/"):
+            return 404, {"error": "not_found", "error_message": f"No route for {path}."}
+
+        mode = path[len("/evaluate/") :].replace("-", "_")
+        if mode not in MODES:
+            return 404, {"error": "not_found", "error_message": f"Unknown mode: {mode}."}
+        if method != "POST":
+            return 405, {"error": "method_not_allowed", "error_message": "Use POST."}
+        if self._draining:
+            return 503, {"error": "draining", "error_message": "Server is shutting down."}
+
+        try:
+            request = json.loads(body or b"{}")
+            prompt = request["prompt"]
+            options = request.get("options") or {}
+            if not isinstance(prompt, str) or not isinstance(options, dict):
+                raise TypeError
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return 400, {
+                "error": "bad_request",
+                "error_message": 'Body must be JSON: {"prompt": str, "options": object}.',
+            }
+        try:
+            options = normalize_options(mode, options)
+        except ValueError as exc:
+            return 400, {"error": "bad_request", "error_message": str(exc)}
+        if self.scheduler is not None:
+            priority = options.get("priority", "interactive")
+            if priority not in self.scheduler.classes:
+                return 400, {
+                    "error": "bad_request",
+                    "error_message": f"Unknown priority: {priority!r}.",
+                }
+
+        return await self._evaluate(mode, prompt, options)
+
+    async def _evaluate(self, mode: str, prompt: str, options: Dict) -> Tuple[int, Dict]:
+        stats = self._stats[mode]
+        stats["requests"] += 1
+        semaphore = self._semaphores[mode]
+        if semaphore.locked():
+            # Only requests that must wait for a slot count against the queue.
+            if self._queued >= self.max_queue:
+                stats["rejected"] += 1
+                return 429, {"error": "queue_full", "error_message": "Too many queued requests."}
+            self._queued += 1
+            try:
+                await semaphore.acquire()
+            finally:
+                self._queued -= 1
+        else:
+            await semaphore.acquire()
+
+        llm = self.llm
+        if self.scheduler is not None:
+            llm = ScheduledLLM(
+                llm,
+                self.scheduler,
+                priority=options.get("priority", "interactive"),
+                tenant=str(options.get("tenant", "default")),
+            )
+
+        stats["in_flight"] += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._executor, run_mode, llm, mode, prompt, options
+            )
+        except Exception as exc:
+            stats["failed"] += 1
+            return 500, {"error": "internal_error", "error_message": str(exc)}
+        finally:
+            stats["in_flight"] -= 1
+            semaphore.release()
+
+        stats["latencies"].append(time.perf_counter() - started)
+        stats["completed" if result.get("ok") else "failed"] += 1
+        return 200, result
+
+
+async def serve(server: EvaluationServer) -> None:
+    await server.start()
+    print(f"Serving on http://{server.host}:{server.port}")
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except NotImplementedError:  # pragma: no cover - Windows
+            pass
+    await stop.wait()
+    print("Draining in-flight requests...")
+    await server.shutdown()
+
+
+def main():
+    from HelloAgentsLLM import HelloAgentsLLM
+
+    parser = argparse.ArgumentParser(description="Prompt evaluation HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-queue", type=int, default=64)
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=None,
+        help="Schedule LLM calls by priority with at most this many in flight.",
+    )
+    for mode in MODES:
+        parser.add_argument(f"--{mode.replace('_', '-')}-limit", type=int, default=None)
+    args = parser.parse_args()
+
+    limits = {
+        mode: getattr(args, f"{mode}_limit")
+        for mode in MODES
+        if getattr(args, f"{mode}_limit") is not None
+    }
+    llm = HelloAgentsLLM(verbose=False)
+    scheduler = LLMScheduler(args.llm_concurrency) if args.llm_concurrency else None
+    server = EvaluationServer(
+        llm,
+        host=args.host,
+        port=args.port,
+        max_queue=args.max_queue,
+        mode_limits=limits,
+        scheduler=scheduler,
+    )
+    asyncio.run(serve(server))
+
+
+if __name__ == "__main__":
+    main()
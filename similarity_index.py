@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 64) - 1
+
+
+def normalize_prompt(prompt: str) -> str:
+    return re.sub(r"\s+", " ", prompt).strip().lower()
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SimilarityIndex:
+    """Persistent MinHash/LSH index of already-evaluated prompts.
+
+    Prompts are normalized (case, whitespace), split into character shingles
+    and reduced to a MinHash signature. LSH banding finds candidates; the
+    share of equal signature slots estimates their Jaccard similarity.
+
+    Entries are appended to a JSON Lines file, so inserts are incremental.
+    Keep one index per evaluation mode, since stored results differ in shape.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: float = 0.9,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands.")
+        self.path = path
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._buckets: List[Dict[tuple, Set[str]]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "hits": 0, "inserts": 0}
+
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        self._index(json.loads(line))
+
+    def _shingles(self, text: str) -> Set[str]:
+        size = self.shingle_size
+        if len(text) <= size:
+            return {text}
+        return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+    def signature(self, prompt: str) -> List[int]:
+        hashes = [_hash64(shingle) for shingle in self._shingles(normalize_prompt(prompt))]
+        return [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._perms
+        ]
+
+    def _band_keys(self, signature: List[int]) -> List[tuple]:
+        rows = self.num_perm // self.bands
+        return [tuple(signature[i * rows : (i + 1) * rows]) for i in range(self.bands)]
+
+    def _index(self, entry: Dict[str, Any]) -> None:
+        if len(entry["signature"]) != self.num_perm:
+            raise ValueError("Stored signatures do not match num_perm.")
+        self._entries[entry["id"]] = entry
+        for band, key in zip(self._buckets, self._band_keys(entry["signature"])):
+            band.setdefault(key, set()).add(entry["id"])
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """Return the most similar stored entry above ``threshold``, or None."""
+        signature = self.signature(prompt)
+        with self._lock:
+            self.stats["lookups"] += 1
+            candidates = set()
+            for band, key in zip(self._buckets, self._band_keys(signature)):
+                candidates |= band.get(key, set())
+
+            best, best_score = None, 0.0
+            for entry_id in candidates:
+                stored = self._entries[entry_id]["signature"]
+                score = sum(x == y for x, y in zip(signature, stored)) / self.num_perm
+                if score > best_score:
+                    best, best_score = self._entries[entry_id], score
+
+            if best is None or best_score < self.threshold:
+                return None
+            self.stats["hits"] += 1
+        return {
+            "id": best["id"],
+            "prompt": best["prompt"],
+            "similarity": best_score,
+            "evaluation": best["evaluation"],
+        }
+
+    def add(self, prompt: str, evaluation: Dict) -> str:
+        """Store an evaluation for ``prompt`` and return its entry id."""
+        entry = {
+            "id": f"{_hash64(normalize_prompt(prompt)):016x}",
+            "prompt": prompt,
+            "signature": self.signature(prompt),
+            "evaluation": evaluation,
+            "created_at": time.time(),
+        }
+        with self._lock:
+            self._index(entry)
+            self.stats["inserts"] += 1
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as handle:
+                    handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return entry["id"]
@@ -0,0 +1,112 @@
+import asyncio
+import queue
+import threading
+from typing import Any, AsyncIterator, Dict, Generator, Iterable, List
+
+from llm_helpers import call_llm_safe
+
+# Event types emitted by the ``*_stream`` generators.
+PLAN_READY = "plan_ready"
+STEP_STARTED = "step_started"
+STEP_FINISHED = "step_finished"
+SYNTHESIS_DELTA = "synthesis_delta"
+SYNTHESIS_RETRY = "synthesis_retry"
+ITERATION_SCORED = "iteration_scored"
+REFLECTION_READY = "reflection_ready"
+PROMPT_REFINED = "prompt_refined"
+FINAL = "final"
+
+_DONE = object()
+_RETRY = object()
+
+
+def make_event(event_type: str, **fields: Any) -> Dict[str, Any]:
+    return {"type": event_type, **fields}
+
+
+def final_result(events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Consume an event stream and return the payload of its ``final`` event."""
+    result: Dict[str, Any] = {}
+    for event in events:
+        if event["type"] == FINAL:
+            result = event["result"]
+    return result
+
+
+def run_to_completion(generator: Generator) -> Any:
+    """Exhaust a generator and return its ``return`` value."""
+    while True:
+        try:
+            next(generator)
+        except StopIteration as stop:
+            return stop.value
+
+
+def call_llm_streaming(
+    llm: Any,
+    messages: List[Dict[str, str]],
+    event_type: str = SYNTHESIS_DELTA,
+    retry_event_type: str = SYNTHESIS_RETRY,
+    **kwargs: Any,
+) -> Generator[Dict[str, Any], None, Dict[str, Any]]:
+    """Yield delta events while the call runs; return the ``call_llm_safe`` result.
+
+    Before a retried attempt streams, a ``retry_event_type`` event with its
+    ``attempt`` number tells consumers to discard the deltas received so far.
+    """
+    chunks: "queue.Queue" = queue.Queue()
+    outcome: Dict[str, Any] = {}
+
+    def worker():
+        try:
+            outcome["result"] = call_llm_safe(
+                llm,
+                messages,
+                on_delta=chunks.put,
+                on_retry=lambda attempt: chunks.put((_RETRY, attempt)),
+                **kwargs,
+            )
+        except BaseException as exc:  # pragma: no cover - re-raised below
+            outcome["error"] = exc
+        finally:
+            chunks.put(_DONE)
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    while True:
+        item = chunks.get()
+        if item is _DONE:
+            break
+        if isinstance(item, tuple) and item[0] is _RETRY:
+            yield make_event(retry_event_type, attempt=item[1])
+        else:
+            yield make_event(event_type, delta=item)
+    thread.join()
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+
+async def aiter_events(events: Iterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """Adapt a blocking event generator to an async iterator.
+
+    Each ``next()`` runs in a worker thread so the event loop stays responsive.
+    Leaving the ``async for`` early closes the underlying generator.
+    """
+    iterator = iter(events)
+    sentinel = object()
+    try:
+        while True:
+            event = await asyncio.to_thread(next, iterator, sentinel)
+            if event is sentinel:
+                return
+            yield event
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            try:
+                close()
+            except ValueError:
+                # The generator is still running in a cancelled worker thread.
+                pass
@@ -1,3 +1,10 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_helpers import error_result, run_with_retry
+
+
 class FakeLLM:
     """Simple deterministic LLM stub for tests."""
 
@@ -10,3 +17,174 @@ class FakeLLM:
         if not self._responses:
             raise RuntimeError("FakeLLM has no more queued responses.")
         return self._responses.pop(0)
+
+
+class ScriptedLLM:
+    """``think_result`` stub; a ``None`` response yields a non-retryable error."""
+
+    def __init__(self, responses):
+        self._responses = list(responses)
+        self.calls = []
+
+    def think_result(self, messages, temperature=0, max_retries=2, base_backoff_seconds=0.5, **kwargs):
+        self.calls.append(messages)
+        if not self._responses:
+            raise RuntimeError("ScriptedLLM has no more queued responses.")
+        content = self._responses.pop(0)
+        if content is None:
+            return {
+                "ok": False,
+                "content": "",
+                "error_type": "bad_request",
+                "error_message": "scripted failure",
+                "attempts": 1,
+            }
+        return {"ok": True, "content": content, "error_type": None, "error_message": "", "attempts": 1}
+
+
+class BaselineLLM:
+    """``think_result`` with the original signature: no streaming hooks."""
+
+    def __init__(self, responses):
+        self._responses = list(responses)
+        self.calls = []
+
+    def think_result(self, messages, temperature=0, max_retries=2, base_backoff_seconds=0.5):
+        self.calls.append(messages)
+        content = self._responses.pop(0)
+        return {"ok": True, "content": content, "error_type": None, "error_message": "", "attempts": 1}
+
+
+class ChunkedLLM:
+    """Returns queued responses through ``on_delta`` in two-character chunks."""
+
+    def __init__(self, responses):
+        self._responses = list(responses)
+
+    def think_result(
+        self, messages, temperature=0, max_retries=2, base_backoff_seconds=0.5, on_delta=None, **kwargs
+    ):
+        content = self._responses.pop(0)
+        if on_delta is not None:
+            for start in range(0, len(content), 2):
+                on_delta(content[start : start + 2])
+        return {"ok": True, "content": content, "error_type": None, "error_message": "", "attempts": 1}
+
+
+class FlakyStreamLLM:
+    """Streams ``partial`` then drops the stream; the retry streams ``content``."""
+
+    def __init__(self, partial, content):
+        self.partial = partial
+        self.content = content
+        self.attempts = 0
+
+    def think_result(
+        self,
+        messages,
+        temperature=0,
+        max_retries=2,
+        base_backoff_seconds=0.5,
+        on_delta=None,
+        on_retry=None,
+        **kwargs,
+    ):
+        def attempt():
+            self.attempts += 1
+            if self.attempts == 1:
+                on_delta(self.partial)
+                return error_result("connection_error", "stream dropped")
+            for start in range(0, len(self.content), 4):
+                on_delta(self.content[start : start + 4])
+            return {"ok": True, "content": self.content, "error_type": None, "error_message": ""}
+
+        return run_with_retry(attempt, max_retries, 0, on_retry=on_retry)
+
+
+class RoutingLLM:
+    """Answers by prompt stage, so concurrent map calls stay deterministic."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def think(self, messages):
+        content = messages[0]["content"]
+        with self._lock:
+            self.calls.append(content)
+        if "Prompt Analysis Planner" in content:
+            return "1. Check clarity\n2. Check format"
+        if "condensing part" in content:
+            return "condensed findings"
+        if "Current Step" in content:
+            return "detailed analysis " * 60
+        return '{"overall": 6}'
+
+
+class OpenAIStub:
+    """Local OpenAI-compatible ``/chat/completions`` endpoint serving queued answers.
+
+    Streams server-sent events when the request asks for ``stream``.
+    """
+
+    def __init__(self, responses):
+        self._responses = list(responses)
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stub.requests.append(body)
+                self.send_response(200)
+                if body.get("stream"):
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for content in stub._next_chunks():
+                        chunk = {
+                            "id": "stub",
+                            "object": "chat.completion.chunk",
+                            "created": 0,
+                            "model": body["model"],
+                            "choices": [{"index": 0, "delta": {"content": content}, "finish_reason": None}],
+                        }
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    return
+                payload = json.dumps(
+                    {
+                        "id": "stub",
+                        "object": "chat.completion",
+                        "created": 0,
+                        "model": body["model"],
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": "".join(stub._next_chunks())},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                    }
+                ).encode()
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def _next_chunks(self):
+        content = self._responses.pop(0)
+        return [content[start : start + 5] for start in range(0, len(content), 5)]
+
+    def __enter__(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,84 @@
+import time
+
+from cassette import RecordingLLM, ReplayLLM
+from evaluators import PlanAndSolveEvaluator
+from tests.fakes import BaselineLLM, ChunkedLLM, FakeLLM, FlakyStreamLLM, RoutingLLM
+
+
+def test_replay_reproduces_a_recorded_pipeline(tmp_path):
+    path = str(tmp_path / "run.jsonl.gz")
+    recorded = PlanAndSolveEvaluator(RecordingLLM(RoutingLLM(), path), max_workers=4).evaluate("p")
+
+    replay = ReplayLLM(path)
+    replayed = PlanAndSolveEvaluator(replay, max_workers=4).evaluate("p")
+
+    assert len(replay) == 4
+    assert replayed == recorded
+    assert replay.stats == {"hits": 4, "misses": 0}
+
+
+def test_replay_serves_chunks_and_repeated_requests_in_order(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    recorder = RecordingLLM(ChunkedLLM(["first answer", "second answer"]), path)
+    messages = [{"role": "user", "content": "same"}]
+    recorder.think_result(messages)
+    recorder.think_result(messages)
+
+    replay = ReplayLLM(path)
+    deltas = []
+    assert replay.think_result(messages, on_delta=deltas.append)["content"] == "first answer"
+    assert "".join(deltas) == "first answer"
+    assert len(deltas) > 1
+    assert replay.think(messages) == "second answer"
+    assert replay.think(messages) == "second answer"
+
+
+def test_recording_keeps_only_the_final_attempt_chunks(tmp_path):
+    path = str(tmp_path / "flaky.jsonl")
+    messages = [{"role": "user", "content": "p"}]
+    retries = []
+    recorded = RecordingLLM(FlakyStreamLLM('{"over', '{"overall": 7}'), path).think_result(
+        messages, base_backoff_seconds=0, on_delta=lambda delta: None, on_retry=retries.append
+    )
+
+    deltas = []
+    replayed = ReplayLLM(path).think_result(messages, on_delta=deltas.append)
+
+    assert retries == [2]
+    assert recorded["attempts"] == 2
+    assert "".join(deltas) == replayed["content"] == '{"overall": 7}'
+
+
+def test_recording_wraps_baseline_clients(tmp_path):
+    path = str(tmp_path / "baseline.jsonl")
+    messages = [{"role": "user", "content": "p"}]
+    deltas = []
+    result = RecordingLLM(BaselineLLM(["answer"]), path).think_result(messages, on_delta=deltas.append)
+
+    assert result["content"] == "answer"
+    assert deltas == ["answer"]
+    assert ReplayLLM(path).think_result(messages)["content"] == "answer"
+
+
+def test_replay_miss_is_a_typed_error(tmp_path):
+    path = str(tmp_path / "cassette.jsonl")
+    RecordingLLM(FakeLLM(["hello"]), path).think([{"role": "user", "content": "a"}])
+
+    result = ReplayLLM(path).think_result([{"role": "user", "content": "b"}])
+    assert result["ok"] is False
+    assert result["error_type"] == "cassette_miss"
+
+
+def test_replay_can_simulate_recorded_latency(tmp_path):
+    class SlowLLM:
+        def think(self, messages):
+            time.sleep(0.05)
+            return "slow"
+
+    path = str(tmp_path / "cassette.jsonl")
+    messages = [{"role": "user", "content": "a"}]
+    RecordingLLM(SlowLLM(), path).think(messages)
+
+    started = time.perf_counter()
+    ReplayLLM(path, simulate_latency=True).think(messages)
+    assert time.perf_counter() - started >= 0.04
@@ -0,0 +1,73 @@
+import pytest
+
+from checkpoint import CheckpointStore
+from evaluators import PlanAndSolveEvaluator
+from reflection_agent import ReflectionPromptAgent
+from tests.fakes import ScriptedLLM
+
+
+def test_store_roundtrip_and_rejects_bad_ids(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    assert store.load("run-1") is None
+    store.save("run-1", {"plan": "1. a"})
+    assert store.load("run-1") == {"plan": "1. a"}
+    store.delete("run-1")
+    assert store.load("run-1") is None
+    with pytest.raises(ValueError):
+        store.save("../escape", {})
+
+
+def test_plan_and_solve_resumes_after_failed_step(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    first = ScriptedLLM(["1. Check clarity\n2. Check format", "clarity analysis", None, "unused"])
+    result = PlanAndSolveEvaluator(first, checkpoint_store=store).evaluate("p", run_id="ps")
+    assert result["ok"] is False
+    first_calls = len(first.calls)
+
+    second = ScriptedLLM(["format analysis", '{"overall": 7}'])
+    result = PlanAndSolveEvaluator(second, checkpoint_store=store).evaluate("p", run_id="ps")
+
+    assert first_calls == 4
+    assert len(second.calls) == 2
+    assert result["ok"] is True
+    assert "clarity analysis" in result["step_analyses"]
+    assert result["final_json"]["overall"] == 7
+
+    third = ScriptedLLM([])
+    assert PlanAndSolveEvaluator(third, checkpoint_store=store).evaluate("p", run_id="ps") == result
+
+
+def test_checkpoint_rejects_different_prompt(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    store.save("ps", {"kind": "plan_and_solve", "prompt": "other", "plan": None, "steps": {}})
+    with pytest.raises(ValueError):
+        PlanAndSolveEvaluator(ScriptedLLM([]), checkpoint_store=store).evaluate("p", run_id="ps")
+
+
+def test_reflection_resumes_from_last_finished_stage(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    first = ScriptedLLM(['{"overall": 5}', "Need detail.", None])
+    agent = ReflectionPromptAgent(first, max_iterations=2, target_overall=8, checkpoint_store=store)
+    assert agent.run("Write quicksort", run_id="rf")["ok"] is False
+
+    second = ScriptedLLM(["Typed quicksort", '{"overall": 9}'])
+    agent = ReflectionPromptAgent(second, max_iterations=2, target_overall=8, checkpoint_store=store)
+    result = agent.run("Write quicksort", run_id="rf")
+
+    assert len(second.calls) == 2
+    assert result["ok"] is True
+    assert result["final_prompt"] == "Typed quicksort"
+    assert result["final_feedback"] == "Target score reached."
+
+
+def test_reflection_runs_on_one_agent_keep_separate_memory(tmp_path):
+    store = CheckpointStore(str(tmp_path))
+    llm = ScriptedLLM(['{"overall": 9}', '{"overall": 9}'])
+    agent = ReflectionPromptAgent(llm, max_iterations=1, checkpoint_store=store)
+    agent.run("p1", run_id="r1")
+    agent.run("p2", run_id="r2")
+
+    assert len(store.load("r1")["memory"]) == 1
+    memory = store.load("r2")["memory"]
+    assert len(memory) == 1
+    assert memory[0]["content"]["prompt"] == "p2"
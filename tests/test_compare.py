@@ -0,0 +1,84 @@
+import math
+import threading
+import time
+
+import pytest
+
+from compare import compare_models
+from stats import spearman
+
+
+class ScoreByPromptLLM:
+    """Returns a fixed overall score per prompt, optionally after a delay."""
+
+    def __init__(self, scores, delay=0.0):
+        self.scores = scores
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def think(self, messages):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        content = messages[0]["content"]
+        for prompt, score in self.scores.items():
+            if content.rstrip().endswith(prompt):
+                return '{"overall": %s}' % score
+        return "no json here"
+
+
+def test_spearman_handles_ties_and_order():
+    assert spearman([1, 2, 3], [10, 20, 30]) == pytest.approx(1.0)
+    assert spearman([1, 2, 3], [3, 2, 1]) == pytest.approx(-1.0)
+    assert spearman([1, 1, 2], [1, 1, 2]) == pytest.approx(1.0)
+
+
+def test_compare_models_aligns_records_and_reports_agreement():
+    prompts = ["alpha", "beta", "gamma"]
+    shared = ScoreByPromptLLM({"alpha": 3, "beta": 6, "gamma": 9}, delay=0.05)
+    models = {
+        "a": shared,
+        "b": ScoreByPromptLLM({"alpha": 2, "beta": 5, "gamma": 8}),
+        "c": ScoreByPromptLLM({"alpha": 9, "beta": 6, "gamma": 1}),
+    }
+
+    comparison = compare_models(prompts, models)
+    records, report = comparison["records"], comparison["report"]
+
+    assert [record["prompt"] for record in records] == prompts
+    assert records[1]["models"]["b"]["overall"] == 5
+    assert records[0]["models"]["a"]["attempts"] == 1
+    assert records[0]["models"]["a"]["prompt_tokens"] > 0
+    assert shared.peak > 1
+    assert report["models"]["a"]["ok"] == 3
+    assert report["models"]["a"]["latency_p50"] >= 0.05
+    assert report["agreement"]["a vs b"]["spearman"] == pytest.approx(1.0)
+    assert report["agreement"]["a vs c"]["spearman"] == pytest.approx(-1.0)
+
+
+def test_unscored_prompts_are_left_out_of_agreement():
+    models = {
+        "a": ScoreByPromptLLM({"alpha": 3, "beta": 6}),
+        "b": ScoreByPromptLLM({"alpha": 4}),
+    }
+    comparison = compare_models(["alpha", "beta"], models)
+
+    assert math.isnan(comparison["records"][1]["models"]["b"]["overall"])
+    assert comparison["report"]["agreement"]["a vs b"]["n"] == 1
+
+
+def test_slow_model_does_not_throttle_the_others():
+    prompts = ["alpha", "beta", "gamma", "delta"]
+    models = {
+        "slow": ScoreByPromptLLM({}, delay=0.1),
+        "fast": ScoreByPromptLLM({}),
+    }
+    report = compare_models(prompts, models, max_workers=1)["report"]
+
+    assert report["models"]["slow"]["throughput_per_second"] < 12
+    assert report["models"]["fast"]["throughput_per_second"] > 40
@@ -0,0 +1,141 @@
+import time
+
+import pytest
+
+from job_queue import JobQueue
+from tests.fakes import FakeLLM, ScriptedLLM
+import worker
+from worker import run_worker
+
+
+def test_claim_complete_and_summary(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.enqueue("basic", "Write quicksort", {"k": 1})
+
+    job = queue.claim("w1")
+    assert job["id"] == job_id
+    assert job["options"] == {"k": 1}
+    assert job["attempts"] == 1
+    assert queue.claim("w2") is None
+
+    assert queue.complete(job_id, "w2", {"ok": True}) is False
+    assert queue.complete(job_id, "w1", {"ok": True}) is True
+    summary = queue.summary()
+    assert summary["counts"]["done"] == 1
+    assert summary["completed_in_window"] == 1
+
+
+def test_expired_lease_is_reclaimed_until_attempts_run_out(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.01, max_attempts=2)
+    job_id = queue.enqueue("basic", "p")
+
+    assert queue.claim("crashed")["attempts"] == 1
+    time.sleep(0.02)
+    assert queue.claim("w2")["attempts"] == 2
+    time.sleep(0.02)
+    assert queue.claim("w3") is None
+    assert queue.get(job_id)["status"] == "failed"
+
+
+def test_failures_retry_then_fail(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=2)
+    job_id = queue.enqueue("basic", "p")
+
+    queue.fail(queue.claim("w")["id"], "w", "boom")
+    assert queue.get(job_id)["status"] == "pending"
+    queue.fail(queue.claim("w")["id"], "w", "boom")
+    assert queue.get(job_id)["status"] == "failed"
+
+
+def test_enqueue_rejects_unknown_mode_and_invalid_options(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"))
+    with pytest.raises(ValueError):
+        queue.enqueue("nope", "p")
+    with pytest.raises(ValueError):
+        queue.enqueue_many(
+            [
+                {"mode": "basic", "prompt": "good"},
+                {"mode": "reflection", "prompt": "p", "options": {"max_iterations": "x"}},
+            ]
+        )
+    assert queue.summary()["total"] == 0
+
+
+def test_worker_runs_jobs_and_fails_non_retryable_errors_at_once(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=3)
+    ok_id, failed_id = queue.enqueue_many(
+        [{"mode": "basic", "prompt": "good"}, {"mode": "basic", "prompt": "bad"}]
+    )
+    llm = ScriptedLLM(['{"overall": 8}', None])
+
+    processed = run_worker(queue, llm_factory=lambda: llm, worker_id="w", exit_when_idle=True)
+
+    assert processed == 2
+    assert queue.get(ok_id)["result"]["json"]["overall"] == 8
+    failed = queue.get(failed_id)
+    assert failed["status"] == "failed"
+    assert failed["attempts"] == 1
+    assert failed["error"].startswith("bad_request")
+
+
+def test_worker_retries_exceptions(tmp_path, monkeypatch):
+    def crash(*args):
+        raise RuntimeError("worker crashed")
+
+    monkeypatch.setattr(worker, "run_mode", crash)
+    queue = JobQueue(str(tmp_path / "jobs.db"), max_attempts=2)
+    job_id = queue.enqueue("basic", "p")
+
+    run_worker(queue, llm_factory=lambda: FakeLLM([]), worker_id="w", exit_when_idle=True)
+
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+    assert "RuntimeError" in job["error"]
+
+
+class SlowLLM:
+    """Answers after ``delay`` seconds; ``during`` runs while the call is in flight."""
+
+    def __init__(self, delay, during=None):
+        self.delay = delay
+        self.during = during
+
+    def think(self, messages):
+        time.sleep(self.delay)
+        if self.during is not None:
+            self.during()
+        return '{"overall": 7}'
+
+
+def test_heartbeat_keeps_long_job_leased(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.2)
+    job_id = queue.enqueue("basic", "p")
+    stolen = []
+    llm = SlowLLM(0.5, during=lambda: stolen.append(queue.claim("thief")))
+
+    run_worker(queue, llm_factory=lambda: llm, worker_id="w", exit_when_idle=True)
+
+    assert stolen == [None]
+    job = queue.get(job_id)
+    assert job["status"] == "done"
+    assert job["attempts"] == 1
+
+
+def test_lost_lease_is_logged(tmp_path, caplog):
+    queue = JobQueue(str(tmp_path / "jobs.db"), lease_seconds=0.05)
+    job_id = queue.enqueue("basic", "p")
+    llm = SlowLLM(0.1, during=lambda: queue.claim("thief"))
+
+    run_worker(
+        queue,
+        llm_factory=lambda: llm,
+        worker_id="w",
+        exit_when_idle=True,
+        max_jobs=1,
+        heartbeat_interval=10,
+    )
+
+    assert queue.get(job_id)["worker"] == "thief"
+    assert queue.get(job_id)["status"] == "leased"
+    assert "lost the lease on job" in caplog.text
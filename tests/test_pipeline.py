@@ -0,0 +1,139 @@
+import threading
+import time
+
+from HelloAgentsLLM import HelloAgentsLLM
+from evaluators import PromptEvaluator
+from llm_helpers import call_llm_safe
+from pipeline import (
+    CacheLayer,
+    DedupLayer,
+    LLMPipeline,
+    MetricsLayer,
+    RateLimitLayer,
+    RetryLayer,
+    TracingLayer,
+    Transport,
+    default_pipeline,
+)
+from tests.fakes import FakeLLM, OpenAIStub
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+class APITimeoutError(Exception):
+    pass
+
+
+class AlwaysTimeoutLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def think(self, messages):
+        self.calls += 1
+        raise APITimeoutError("timeout")
+
+
+class ThinkOnlyWrapper:
+    """A ``think()``-only wrapper around a full client."""
+
+    def __init__(self, llm):
+        self.llm = llm
+
+    def think(self, messages):
+        return self.llm.think(messages)
+
+
+def test_call_llm_safe_and_pipeline_bound_attempts_once():
+    llm = AlwaysTimeoutLLM()
+    pipeline = LLMPipeline(llm, [RetryLayer(max_attempts=3, base_backoff_seconds=0)])
+
+    result = call_llm_safe(pipeline, MESSAGES, max_retries=5, base_backoff_seconds=0)
+
+    assert result["ok"] is False
+    assert result["error_type"] == "timeout"
+    assert result["attempts"] == 3
+    assert llm.calls == 3
+
+
+def test_transport_never_retries():
+    llm = AlwaysTimeoutLLM()
+    result = Transport(llm)({"messages": MESSAGES})
+    assert result["error_type"] == "timeout"
+    assert llm.calls == 1
+
+
+def test_think_only_wrapper_attempts_are_bounded_by_retry_layer():
+    with OpenAIStub([""] * 9) as stub:
+        llm = HelloAgentsLLM(model="stub", apiKey="test", baseUrl=stub.base_url, verbose=False)
+        result = default_pipeline(ThinkOnlyWrapper(llm), base_backoff_seconds=0).think_result(MESSAGES)
+
+    assert result["error_type"] == "empty_response"
+    assert result["attempts"] == 3
+    assert len(stub.requests) == 3
+
+
+def test_cache_serves_repeated_requests():
+    cache = CacheLayer()
+    llm = FakeLLM(['{"overall": 7}'])
+    evaluator = PromptEvaluator(LLMPipeline(llm, [cache, RetryLayer(base_backoff_seconds=0)]))
+
+    assert evaluator.evaluate("p") == evaluator.evaluate("p") == '{"overall": 7}'
+    assert len(llm.calls) == 1
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+
+def test_dedup_coalesces_concurrent_identical_requests():
+    release = threading.Event()
+    calls = []
+
+    def transport(request):
+        calls.append(request)
+        release.wait(timeout=5)
+        return {"ok": True, "content": "x", "error_type": None, "error_message": "", "attempts": 1}
+
+    dedup = DedupLayer()
+    pipeline = LLMPipeline(transport, [dedup])
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(pipeline.think_result(MESSAGES)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    while dedup.stats["coalesced"] < 3:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [result["content"] for result in results] == ["x"] * 4
+
+
+def test_metrics_tracing_and_layer_overhead():
+    metrics = MetricsLayer()
+    tracing = TracingLayer()
+    pipeline = LLMPipeline(
+        FakeLLM(["a", "b"]),
+        [metrics, tracing, RateLimitLayer(rate_per_second=1000, burst=5), RetryLayer()],
+    )
+    pipeline.think(MESSAGES)
+    pipeline.think([{"role": "user", "content": "other"}])
+
+    assert metrics.snapshot()["calls"] == 2
+    assert metrics.snapshot()["ok"] == 2
+    assert len(tracing.spans) == 2
+    stats = pipeline.layer_stats()
+    assert [row["layer"] for row in stats] == [
+        "metrics",
+        "tracing",
+        "rate_limit",
+        "retry",
+        "transport",
+    ]
+    assert all(row["calls"] == 2 and row["overhead_seconds"] >= 0 for row in stats)
+
+
+def test_default_pipeline_plugs_into_evaluators():
+    pipeline = default_pipeline(FakeLLM(['{"overall": 8}']), base_backoff_seconds=0)
+    assert PromptEvaluator(pipeline).evaluate_as_json("p")["overall"] == 8
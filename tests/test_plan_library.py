@@ -0,0 +1,100 @@
+from evaluators import PlanAndSolveEvaluator
+from plan_library import PlanLibrary, classify_prompt
+from tests.fakes import FakeLLM
+
+
+def test_keyword_classifier():
+    assert classify_prompt("Write a Python function that parses dates") == "code_gen"
+    assert classify_prompt("Summarize this report in three bullet points") == "summarization"
+    assert classify_prompt("Translate the text into French") == "translation"
+    assert classify_prompt("Hello there") == "general"
+
+
+def test_library_hits_misses_and_persistence(tmp_path):
+    path = str(tmp_path / "plans.json")
+    library = PlanLibrary(path)
+    assert library.get("qa") is None
+    library.put("qa", "1. Check clarity")
+
+    reopened = PlanLibrary(path)
+    assert reopened.get("qa") == "1. Check clarity"
+    assert reopened.stats()["hit_rate"] == 1.0
+    assert library.stats() == {
+        "hits": 0,
+        "misses": 1,
+        "stale": 0,
+        "stores": 1,
+        "entries": 1,
+        "hit_rate": 0.0,
+    }
+
+
+def test_hits_do_not_rewrite_the_file_until_flushed(tmp_path):
+    path = tmp_path / "plans.json"
+    library = PlanLibrary(str(path), max_uses=1)
+    library.put("qa", "plan")
+    saved = path.read_text()
+
+    assert library.get("qa") == "plan"
+    assert path.read_text() == saved
+    assert PlanLibrary(str(path), max_uses=1).get("qa") == "plan"
+
+    library.flush()
+    assert PlanLibrary(str(path), max_uses=1).get("qa") is None
+
+
+def test_stale_plans_miss_and_can_be_refreshed():
+    library = PlanLibrary(max_uses=1)
+    library.put("qa", "plan")
+    library.put("writing", "plan")
+    assert library.get("qa") == "plan"
+    assert library.get("qa") is None
+    assert library.stats()["stale"] == 1
+
+    assert library.refresh() == 1
+    assert library.refresh("writing") == 1
+    assert library.stats()["entries"] == 0
+
+
+def test_evaluator_skips_planner_on_library_hit():
+    library = PlanLibrary()
+    llm = FakeLLM(["1. Check clarity", "analysis", '{"overall": 7}', "analysis", '{"overall": 8}'])
+    evaluator = PlanAndSolveEvaluator(llm, plan_library=library)
+
+    first = evaluator.evaluate("Summarize the meeting notes")
+    second = evaluator.evaluate("Summarize this long article")
+
+    assert first["plan_source"] == "planner"
+    assert second["plan_source"] == "library"
+    assert second["plan_category"] == "summarization"
+    assert second["plan"] == "1. Check clarity"
+    assert second["final_json"]["overall"] == 8
+    assert len(llm.calls) == 5
+
+
+def test_failed_runs_do_not_store_plans():
+    library = PlanLibrary()
+    llm = FakeLLM(["1. Check clarity", "analysis", ""])
+    result = PlanAndSolveEvaluator(llm, plan_library=library).evaluate("p", category="qa")
+
+    assert not result["ok"]
+    assert library.stats()["entries"] == 0
+
+
+def test_uncategorized_prompts_always_call_the_planner():
+    library = PlanLibrary()
+    llm = FakeLLM(
+        ["1. Check tone", "analysis", '{"overall": 6}', "1. Check rhyme", "analysis", '{"overall": 7}']
+    )
+    evaluator = PlanAndSolveEvaluator(llm, plan_library=library)
+
+    first = evaluator.evaluate("Hello there")
+    second = evaluator.evaluate("Make me a limerick")
+
+    assert first["plan_source"] == second["plan_source"] == "planner"
+    assert second["plan"] == "1. Check rhyme"
+    assert library.stats()["entries"] == 0
+
+    evaluator.llm = FakeLLM(["1. Generic", "analysis", '{"overall": 5}'])
+    evaluator.evaluate("Hello there", category="general")
+    assert library.stats()["entries"] == 1
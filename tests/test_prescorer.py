@@ -0,0 +1,72 @@
+from evaluators import PlanAndSolveEvaluator, PromptEvaluator
+from prescorer import PreScoreGate, prescore, prescore_batch
+from reflection_agent import ReflectionPromptAgent
+from tests.fakes import FakeLLM, ScriptedLLM
+
+RICH = (
+    "You are a senior Python reviewer. Review the function below for bugs. "
+    'You must return only JSON: {"line": int, "severity": "high|low", "message": str}. '
+    "Do not include more than 10 findings. Never comment on style only. "
+    'Example: {"line": 3, "severity": "low", "message": "unused import"}.'
+)
+MIDDLING = "Review this Python function and list the bugs you find in a short list, one per line."
+
+
+def test_prescore_separates_trivial_and_detailed_prompts():
+    trivial, rich = prescore_batch(["write code", RICH])
+    assert trivial["overall"] < 3 < 8 < rich["overall"]
+    assert min(trivial["confidence"], rich["confidence"]) >= 0.7
+    assert "no output format specified" in trivial["problems"]
+    assert prescore("write code") == trivial
+
+
+def test_basic_evaluator_skips_confident_prompts_and_records_agreement():
+    gate = PreScoreGate()
+    llm = FakeLLM(['{"overall": 5, "clarity": 6}'])
+    evaluator = PromptEvaluator(llm, gate=gate)
+
+    skipped = evaluator.evaluate_result("write code")
+    evaluated = evaluator.evaluate_result(MIDDLING)
+
+    assert skipped["prescored"] is True
+    assert skipped["attempts"] == 0
+    assert evaluator.parse_json(skipped["content"])["overall"] < 3
+    assert evaluated["content"] == '{"overall": 5, "clarity": 6}'
+    assert len(llm.calls) == 1
+
+    report = gate.report()
+    assert report["calls_avoided"] == 1
+    assert report["decisions"] == {"basic:skip": 1, "basic:llm": 1}
+    assert report["agreement"]["overall"]["n"] == 1
+
+
+def test_plan_and_solve_is_routed_to_basic_when_moderately_confident():
+    gate = PreScoreGate(skip_below=1.0, skip_above=10.0, basic_confidence=0.0)
+    llm = FakeLLM(['{"overall": 4}'])
+    result = PlanAndSolveEvaluator(llm, gate=gate).evaluate(MIDDLING)
+
+    assert result["routed_to"] == "basic"
+    assert result["final_json"]["overall"] == 4
+    assert len(llm.calls) == 1
+    report = gate.report()
+    assert report["calls_avoided"] == 5
+    assert report["agreement"]["overall"]["n"] == 1
+
+
+def test_failed_basic_route_avoids_no_calls_and_records_nothing():
+    gate = PreScoreGate(skip_below=1.0, skip_above=10.0, basic_confidence=0.0)
+    result = PlanAndSolveEvaluator(ScriptedLLM([None]), gate=gate).evaluate(MIDDLING)
+
+    assert result["ok"] is False
+    report = gate.report()
+    assert report["decisions"] == {"plan_and_solve:basic": 1}
+    assert report["calls_avoided"] == 0
+    assert report["agreement"]["overall"]["n"] == 0
+
+
+def test_reflection_agent_uses_gate_for_evaluations():
+    agent = ReflectionPromptAgent(FakeLLM([]), gate=PreScoreGate())
+    result = agent.run(RICH)
+
+    assert result["final_feedback"] == "Target score reached."
+    assert result["memory"][0]["content"]["call"]["prescored"] is True
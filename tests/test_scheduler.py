@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+
+from evaluators import PromptEvaluator
+from pipeline import LLMPipeline, SchedulerLayer, default_pipeline
+from scheduler import LLMScheduler, ScheduledLLM
+from tests.fakes import FakeLLM, ScriptedLLM
+
+
+def _queued(scheduler):
+    return sum(stats["queued"] for stats in scheduler.stats()["classes"].values())
+
+
+def _run_in_order(scheduler, calls):
+    """Queue ``calls`` behind a held slot, release it and return the run order."""
+    order = []
+    scheduler.acquire("interactive")
+    threads = []
+    for label, priority, tenant in calls:
+        thread = threading.Thread(
+            target=scheduler.run, args=(lambda label=label: order.append(label), priority, tenant)
+        )
+        thread.start()
+        threads.append(thread)
+        while _queued(scheduler) < len(threads):
+            time.sleep(0.001)
+    scheduler.release("interactive")
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+
+def test_higher_priority_class_runs_first():
+    scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0)
+    order = _run_in_order(
+        scheduler,
+        [("batch", "batch", "t"), ("default", "default", "t"), ("interactive", "interactive", "t")],
+    )
+    assert order == ["interactive", "default", "batch"]
+
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert stats["classes"]["batch"]["completed"] == 1
+    assert stats["classes"]["batch"]["wait_p95"] >= stats["classes"]["interactive"]["wait_p95"]
+
+
+def test_tenants_share_a_class_round_robin():
+    scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0)
+    order = _run_in_order(
+        scheduler,
+        [("a1", "batch", "a"), ("a2", "batch", "a"), ("a3", "batch", "a"), ("b1", "batch", "b")],
+    )
+    assert order == ["a1", "b1", "a2", "a3"]
+
+
+def test_aging_lets_old_batch_calls_overtake():
+    scheduler = LLMScheduler(max_concurrency=1, aging_seconds=0.02)
+    scheduler.acquire("interactive")
+    order = []
+    batch = threading.Thread(target=scheduler.run, args=(lambda: order.append("batch"), "batch"))
+    batch.start()
+    time.sleep(0.1)
+    interactive = threading.Thread(
+        target=scheduler.run, args=(lambda: order.append("interactive"), "interactive")
+    )
+    interactive.start()
+    while _queued(scheduler) < 2:
+        time.sleep(0.001)
+    scheduler.release("interactive")
+    batch.join(timeout=5)
+    interactive.join(timeout=5)
+
+    assert order == ["batch", "interactive"]
+    assert scheduler.stats()["classes"]["batch"]["aged"] == 1
+
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ValueError):
+        LLMScheduler().acquire("urgent")
+
+
+def test_scheduled_llm_routes_calls_through_scheduler():
+    scheduler = LLMScheduler(max_concurrency=2)
+    llm = ScheduledLLM(FakeLLM(['{"overall": 7}', "", "retried"]), scheduler, priority="interactive")
+    result = PromptEvaluator(llm).evaluate_result("p")
+    assert result["ok"]
+
+    retried = llm.scoped(priority="batch", tenant="job-1").think_result(
+        [{"role": "user", "content": "p"}], base_backoff_seconds=0
+    )
+    assert retried["content"] == "retried"
+    assert retried["attempts"] == 2
+
+    bad = ScheduledLLM(ScriptedLLM([None]), scheduler).think_result([{"role": "user", "content": "p"}])
+    assert bad["error_type"] == "bad_request"
+
+    classes = scheduler.stats()["classes"]
+    assert classes["interactive"]["completed"] == 1
+    # Each attempt takes its own slot.
+    assert classes["batch"]["completed"] == 2
+    assert classes["default"]["completed"] == 1
+
+
+def test_scheduler_layer_uses_request_priority():
+    scheduler = LLMScheduler()
+    pipeline = LLMPipeline(FakeLLM(["ok"]), [SchedulerLayer(scheduler, priority="batch")])
+    result = pipeline.think_result([{"role": "user", "content": "p"}], priority="interactive")
+
+    assert result["content"] == "ok"
+    assert scheduler.stats()["classes"]["interactive"]["submitted"] == 1
+    assert scheduler.stats()["classes"]["batch"]["submitted"] == 0
+
+
+def test_scheduled_pipeline_is_not_retried_twice():
+    llm = FakeLLM([""] * 9)
+    scheduled = ScheduledLLM(default_pipeline(llm, base_backoff_seconds=0), LLMScheduler())
+
+    result = scheduled.think_result([{"role": "user", "content": "p"}])
+
+    assert result["error_type"] == "empty_response"
+    assert result["attempts"] == len(llm.calls) == 3
@@ -0,0 +1,75 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from score_store import ScoreStore, prompt_id, scores_from_result  # noqa: E402
+
+
+def _scores(overall, clarity=5):
+    return {"overall": overall, "clarity": clarity, "problems": "n/a"}
+
+
+def test_scores_from_result_accepts_evaluator_shapes():
+    plan_and_solve = {"final_json": {"overall": 7, "clarity": "8"}}
+    scores = scores_from_result(plan_and_solve)
+    assert scores["overall"] == 7.0
+    assert scores["clarity"] == 8.0
+    assert math.isnan(scores["specificity"])
+    assert scores_from_result({"overall": 3})["overall"] == 3.0
+
+
+def test_append_and_percentiles_survive_reopen(tmp_path):
+    store = ScoreStore(str(tmp_path))
+    store.append("v1", ["a", "b", "c", "d"], [_scores(s) for s in (2, 4, 6, 8)], {"model": "m1"})
+
+    reopened = ScoreStore(str(tmp_path))
+    assert len(reopened) == 4
+    assert reopened.runs()[0]["model"] == "m1"
+    assert reopened.percentiles("v1", q=[50])["overall"][50] == 5.0
+    assert reopened.column("prompt_id")[0] == prompt_id("a")
+
+
+def test_drift_and_regressions_between_runs(tmp_path):
+    store = ScoreStore(str(tmp_path))
+    prompts = ["a", "b", "c"]
+    store.append("v1", prompts, [_scores(8), _scores(6), _scores(5)])
+    store.append("v2", prompts, [_scores(3), _scores(7), _scores(4)])
+    store.append("v2", ["c"], [_scores(1)])
+
+    drift = store.drift("v1", "v2")
+    assert drift["overall"]["mean_a"] == pytest.approx(19 / 3)
+    assert drift["clarity"]["delta_mean"] == 0
+
+    worst = store.regressions("v1", "v2", top=1)
+    assert worst == [{"prompt_id": prompt_id("a"), "before": 8.0, "after": 3.0, "delta": -5.0}]
+    assert [row["prompt_id"] for row in store.regressions("v1", "v2")] == [
+        prompt_id("a"),
+        prompt_id("c"),
+    ]
+
+
+def test_unknown_run_raises(tmp_path):
+    with pytest.raises(KeyError):
+        ScoreStore(str(tmp_path)).percentiles("missing")
+
+
+def test_interrupted_append_does_not_misalign_columns(tmp_path):
+    store = ScoreStore(str(tmp_path))
+    store.append("v1", ["a", "b"], [_scores(8), _scores(6)])
+    # Simulate a crash after only the first column of an append was written.
+    with open(tmp_path / "prompt_id.bin", "ab") as handle:
+        handle.write(np.asarray([prompt_id("stale")], dtype=np.uint64).tobytes())
+    assert len(ScoreStore(str(tmp_path))) == 2
+
+    store.append("v1", ["c"], [_scores(4)])
+
+    reopened = ScoreStore(str(tmp_path))
+    assert len(reopened) == 3
+    assert list(reopened.column("prompt_id")) == [prompt_id(p) for p in ("a", "b", "c")]
+    assert list(reopened.column("overall")) == [8.0, 6.0, 4.0]
+    assert all(
+        (tmp_path / f"{name}.bin").stat().st_size == 3 * np.dtype(dtype).itemsize
+        for name, dtype in [("prompt_id", np.uint64), ("overall", np.float32)]
+    )
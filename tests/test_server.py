@@ -0,0 +1,165 @@
+import asyncio
+import json
+import threading
+
+from HelloAgentsLLM import HelloAgentsLLM
+from scheduler import LLMScheduler
+from server import EvaluationServer
+from tests.fakes import FakeLLM, OpenAIStub
+
+
+class BlockingLLM:
+    """Blocks every call until ``release`` is set."""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def think(self, messages):
+        self.release.wait(timeout=5)
+        return '{"overall": 7}'
+
+
+async def _request(port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, content = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(content)
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_basic_endpoint_and_health():
+    async def scenario():
+        server = EvaluationServer(FakeLLM(['{"overall": 8, "clarity": 9}']), port=0)
+        await server.start()
+        try:
+            health = await _request(server.port, "GET", "/health")
+            evaluation = await _request(server.port, "POST", "/evaluate/basic", {"prompt": "p"})
+            metrics = await _request(server.port, "GET", "/metrics")
+        finally:
+            await server.shutdown()
+        return health, evaluation, metrics
+
+    health, evaluation, metrics = _run(scenario())
+    assert health == (200, {"status": "ok"})
+    assert evaluation[0] == 200
+    assert evaluation[1]["json"]["overall"] == 8
+    assert metrics[1]["modes"]["basic"]["completed"] == 1
+
+
+def test_rejects_bad_requests():
+    async def scenario():
+        server = EvaluationServer(FakeLLM([]), port=0)
+        await server.start()
+        try:
+            missing = await _request(server.port, "POST", "/evaluate/basic", {"text": "p"})
+            unknown = await _request(server.port, "POST", "/evaluate/other", {"prompt": "p"})
+            bad_option = await _request(
+                server.port,
+                "POST",
+                "/evaluate/reflection",
+                {"prompt": "p", "options": {"max_iterations": "x"}},
+            )
+        finally:
+            await server.shutdown()
+        return missing, unknown, bad_option
+
+    missing, unknown, bad_option = _run(scenario())
+    assert missing[0] == 400
+    assert unknown[0] == 404
+    assert bad_option[0] == 400
+    assert "max_iterations" in bad_option[1]["error_message"]
+
+
+def test_queue_full_returns_429_and_shutdown_drains():
+    llm = BlockingLLM()
+
+    async def scenario():
+        server = EvaluationServer(llm, port=0, max_queue=1, mode_limits={"basic": 1})
+        await server.start()
+        post = lambda prompt: _request(server.port, "POST", "/evaluate/basic", {"prompt": prompt})
+        running = asyncio.create_task(post("a"))
+        await asyncio.sleep(0.1)
+        queued = asyncio.create_task(post("b"))
+        await asyncio.sleep(0.1)
+        rejected = await post("c")
+
+        llm.release.set()
+        await server.shutdown(timeout=5)
+        return rejected, await running, await queued
+
+    rejected, running, queued = _run(scenario())
+    assert rejected[0] == 429
+    assert running[0] == 200
+    assert queued[0] == 200
+
+
+def test_zero_queue_serves_idle_server_and_rejects_waiting_requests():
+    llm = BlockingLLM()
+
+    async def scenario():
+        server = EvaluationServer(llm, port=0, max_queue=0, mode_limits={"basic": 1})
+        await server.start()
+        post = lambda prompt: _request(server.port, "POST", "/evaluate/basic", {"prompt": prompt})
+        running = asyncio.create_task(post("a"))
+        await asyncio.sleep(0.1)
+        rejected = await post("b")
+
+        llm.release.set()
+        await server.shutdown(timeout=5)
+        return await running, rejected
+
+    running, rejected = _run(scenario())
+    assert running[0] == 200
+    assert rejected == (429, {"error": "queue_full", "error_message": "Too many queued requests."})
+
+
+def test_scheduler_priority_and_metrics():
+    async def scenario():
+        scheduler = LLMScheduler(max_concurrency=2)
+        server = EvaluationServer(FakeLLM(['{"overall": 6}']), port=0, scheduler=scheduler)
+        await server.start()
+        try:
+            bad = await _request(
+                server.port, "POST", "/evaluate/basic", {"prompt": "p", "options": {"priority": "vip"}}
+            )
+            evaluation = await _request(
+                server.port, "POST", "/evaluate/basic", {"prompt": "p", "options": {"tenant": "team-a"}}
+            )
+            metrics = await _request(server.port, "GET", "/metrics")
+        finally:
+            await server.shutdown()
+        return bad, evaluation, metrics
+
+    bad, evaluation, metrics = _run(scenario())
+    assert bad[0] == 400
+    assert evaluation[0] == 200
+    assert metrics[1]["scheduler"]["classes"]["interactive"]["completed"] == 1
+
+
+def test_against_local_openai_compatible_endpoint():
+    with OpenAIStub(['{"overall": 7, "clarity": 8}']) as stub:
+        llm = HelloAgentsLLM(model="stub", apiKey="test", baseUrl=stub.base_url, verbose=False)
+
+        async def scenario():
+            server = EvaluationServer(llm, port=0)
+            await server.start()
+            try:
+                return await _request(server.port, "POST", "/evaluate/basic", {"prompt": "p"})
+            finally:
+                await server.shutdown()
+
+        status, payload = _run(scenario())
+
+    assert status == 200
+    assert payload["json"]["overall"] == 7
+    assert stub.requests[0]["messages"][0]["role"] == "user"
@@ -0,0 +1,58 @@
+from evaluators import PlanAndSolveEvaluator, PromptEvaluator
+from similarity_index import SimilarityIndex
+from tests.fakes import FakeLLM
+
+BASE = (
+    "You are a senior Python reviewer. Review the following function for bugs, "
+    "performance problems and style issues. Return a JSON list of findings with "
+    "fields line, severity and message."
+)
+
+
+def test_near_duplicates_match_and_unrelated_prompts_do_not():
+    index = SimilarityIndex(threshold=0.8)
+    index.add(BASE, {"content": "stored"})
+
+    hit = index.lookup("  " + BASE.replace(" bugs,", "   bugs,").upper())
+    assert hit is not None
+    assert hit["similarity"] == 1.0
+    assert index.lookup(BASE + " Keep it short.")["evaluation"] == {"content": "stored"}
+    assert index.lookup("Summarize this news article in three bullet points.") is None
+
+
+def test_index_persists_and_supports_incremental_inserts(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    SimilarityIndex(path).add(BASE, {"content": "first"})
+    reopened = SimilarityIndex(path)
+    reopened.add("Translate the text into French.", {"content": "second"})
+
+    again = SimilarityIndex(path)
+    assert len(again) == 2
+    assert again.lookup(BASE)["evaluation"]["content"] == "first"
+
+
+def test_prompt_evaluator_reuses_stored_evaluation():
+    index = SimilarityIndex(threshold=0.8)
+    llm = FakeLLM(['{"overall": 6}'])
+    evaluator = PromptEvaluator(llm, similarity_index=index)
+
+    first = evaluator.evaluate_result(BASE)
+    second = evaluator.evaluate_result(BASE + " Be concise.")
+
+    assert len(llm.calls) == 1
+    assert "reused_from" not in first
+    assert second["content"] == '{"overall": 6}'
+    assert second["reused_from"] == index.lookup(BASE)["id"]
+
+
+def test_plan_and_solve_skips_planner_for_near_duplicate():
+    index = SimilarityIndex(threshold=0.8)
+    llm = FakeLLM(["1. Only step", "analysis", '{"overall": 7}'])
+    evaluator = PlanAndSolveEvaluator(llm, similarity_index=index)
+
+    evaluator.evaluate(BASE)
+    reused = evaluator.evaluate(BASE.replace("function", "method"))
+
+    assert len(llm.calls) == 3
+    assert reused["final_json"]["overall"] == 7
+    assert reused["similarity"] >= 0.8
@@ -0,0 +1,110 @@
+import asyncio
+
+import evaluators
+
+from evaluators import PlanAndSolveEvaluator
+from reflection_agent import ReflectionPromptAgent
+from streaming import SYNTHESIS_DELTA, SYNTHESIS_RETRY, call_llm_streaming
+from tests.fakes import BaselineLLM, ChunkedLLM, FakeLLM, FlakyStreamLLM
+
+
+def test_plan_and_solve_stream_emits_progress_then_final():
+    llm = FakeLLM(
+        [
+            "1. Check clarity\n2. Check specificity",
+            "clarity analysis",
+            "specificity analysis",
+            '{"overall": 7}',
+        ]
+    )
+    events = list(PlanAndSolveEvaluator(llm).evaluate_stream("Write an article about AI"))
+    types = [event["type"] for event in events]
+
+    assert types == [
+        "plan_ready",
+        "step_started",
+        "step_finished",
+        "step_started",
+        "step_finished",
+        "synthesis_delta",
+        "final",
+    ]
+    assert events[0]["steps"] == ["1. Check clarity", "2. Check specificity"]
+    assert events[2]["analysis"] == "clarity analysis"
+    assert events[-1]["result"]["final_json"]["overall"] == 7
+
+
+def test_synthesis_deltas_are_forwarded_incrementally():
+    llm = ChunkedLLM(["1. Only step", "analysis", '{"overall": 8}'])
+    events = list(PlanAndSolveEvaluator(llm).evaluate_stream("p"))
+    deltas = [event["delta"] for event in events if event["type"] == "synthesis_delta"]
+
+    assert len(deltas) > 1
+    assert "".join(deltas) == '{"overall": 8}'
+    assert events[-1]["result"]["final_raw"] == '{"overall": 8}'
+
+
+def test_retried_stream_signals_reset_before_new_deltas():
+    llm = FlakyStreamLLM('{"over', '{"overall": 7}')
+    events = list(call_llm_streaming(llm, [{"role": "user", "content": "p"}], base_backoff_seconds=0))
+
+    assert events[0] == {"type": SYNTHESIS_DELTA, "delta": '{"over'}
+    assert events[1] == {"type": SYNTHESIS_RETRY, "attempt": 2}
+    rendered = ""
+    for event in events:
+        rendered = "" if event["type"] == SYNTHESIS_RETRY else rendered + event["delta"]
+    assert rendered == '{"overall": 7}'
+
+
+def test_baseline_clients_work_with_and_without_streaming(monkeypatch):
+    def no_streaming(*args, **kwargs):
+        raise AssertionError("evaluate() must not stream")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(evaluators, "call_llm_streaming", no_streaming)
+        llm = BaselineLLM(["1. Only step", "analysis", '{"overall": 6}'])
+        assert PlanAndSolveEvaluator(llm).evaluate("p")["final_json"]["overall"] == 6
+
+    llm = BaselineLLM(["1. Only step", "analysis", '{"overall": 8}'])
+    events = list(PlanAndSolveEvaluator(llm).evaluate_stream("p"))
+    assert [event["delta"] for event in events if event["type"] == SYNTHESIS_DELTA] == [
+        '{"overall": 8}'
+    ]
+    assert events[-1]["result"]["ok"] is True
+
+
+def test_reflection_stream_reports_scores_and_refinements():
+    llm = FakeLLM(
+        [
+            '{"overall": 5}',
+            "Need more detail.",
+            "Improved prompt",
+            '{"overall": 9}',
+        ]
+    )
+    agent = ReflectionPromptAgent(llm, max_iterations=3, target_overall=8)
+    events = list(agent.run_stream("Write quicksort"))
+
+    assert [event["type"] for event in events] == [
+        "iteration_scored",
+        "reflection_ready",
+        "prompt_refined",
+        "iteration_scored",
+        "final",
+    ]
+    assert events[2]["prompt"] == "Improved prompt"
+    assert events[-1]["result"]["final_feedback"] == "Target score reached."
+
+
+def test_async_stream_can_stop_early():
+    llm = FakeLLM(["1. A\n2. B", "a", "b", '{"overall": 6}'])
+    evaluator = PlanAndSolveEvaluator(llm)
+
+    async def first_plan():
+        async for event in evaluator.aevaluate_stream("p"):
+            if event["type"] == "plan_ready":
+                return event
+
+    event = asyncio.run(first_plan())
+    assert event["steps"] == ["1. A", "2. B"]
+    assert len(llm.calls) == 1
@@ -0,0 +1,66 @@
+from evaluators import PlanAndSolveEvaluator
+from tests.fakes import RoutingLLM
+from tokens import chunk_text, estimate_tokens, truncate_middle
+
+
+def test_estimate_and_chunk_respect_budget():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("评分模板") == 4
+
+    text = "\n\n".join(f"paragraph {i} " + "x" * 200 for i in range(10))
+    chunks = chunk_text(text, 100)
+    assert len(chunks) > 1
+    assert all(estimate_tokens(chunk) <= 100 for chunk in chunks)
+    assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+    assert chunk_text("short", 100) == ["short"]
+
+
+def test_truncate_middle_keeps_head_and_tail():
+    text = "HEAD" + "x" * 4000 + "TAIL"
+    truncated = truncate_middle(text, 50)
+    assert truncated.startswith("HEAD")
+    assert truncated.endswith("TAIL")
+    assert "omitted" in truncated
+    assert estimate_tokens(truncated) < 80
+
+
+def test_default_run_takes_direct_path():
+    llm = RoutingLLM()
+    result = PlanAndSolveEvaluator(llm).evaluate("Write quicksort")
+
+    assert result["synthesis_path"] == "direct"
+    assert result["prompt_chunks"] == 1
+    assert result["over_budget"] is False
+    assert len(llm.calls) == 4
+
+
+def test_long_prompt_is_chunked_and_synthesis_map_reduced():
+    llm = RoutingLLM()
+    prompt = "\n\n".join(f"Rule {i}: " + "keep answers short " * 40 for i in range(12))
+    evaluator = PlanAndSolveEvaluator(llm, token_budget=600)
+
+    result = evaluator.evaluate(prompt)
+
+    assert result["ok"] is True
+    assert result["prompt_chunks"] > 1
+    assert result["synthesis_path"] == "map_reduce"
+    assert result["over_budget"] is False
+    assert result["final_json"]["overall"] == 6
+    assert all(estimate_tokens(call) <= 600 for call in llm.calls)
+    synthesis = [call for call in llm.calls if "final scoring" in call]
+    assert len(synthesis) == 1
+    assert "condensed findings" in synthesis[0]
+
+
+def test_unmeetable_budget_is_reported():
+    llm = RoutingLLM()
+    prompt = "\n\n".join(f"Rule {i}: " + "keep answers short " * 40 for i in range(12))
+
+    tiny = PlanAndSolveEvaluator(llm, token_budget=100).evaluate(prompt)
+    assert tiny["over_budget"] is True
+    assert {"plan", "step"} <= set(tiny["over_budget_stages"])
+
+    no_reduce = PlanAndSolveEvaluator(llm, token_budget=600, max_reduce_rounds=0).evaluate(prompt)
+    assert no_reduce["ok"] is True
+    assert no_reduce["over_budget_stages"] == ["synthesis"]
@@ -0,0 +1,71 @@
+import math
+import re
+from typing import List
+
+# CJK, Hangul and full-width forms usually cost about one token per character.
+_WIDE = re.compile(r"[\u3000-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def _char_cost(char: str) -> float:
+    return 1.0 if _WIDE.match(char) else 0.25
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough local token count: ~4 characters per token, one per CJK character."""
+    if not text:
+        return 0
+    wide = len(_WIDE.findall(text))
+    return math.ceil((len(text) - wide) / 4) + wide
+
+
+def _hard_split(text: str, max_tokens: int) -> List[str]:
+    chunks, start, cost = [], 0, 0.0
+    for index, char in enumerate(text):
+        char_cost = _char_cost(char)
+        if cost + char_cost > max_tokens and index > start:
+            chunks.append(text[start:index])
+            start, cost = index, 0.0
+        cost += char_cost
+    chunks.append(text[start:])
+    return chunks
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """Split ``text`` into chunks of at most ``max_tokens``, preferring paragraph,
+    then line boundaries."""
+    if estimate_tokens(text) <= max_tokens:
+        return [text]
+
+    pieces = []
+    for paragraph in text.split("\n\n"):
+        if estimate_tokens(paragraph) <= max_tokens:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.split("\n"):
+            if estimate_tokens(line) <= max_tokens:
+                pieces.append(line)
+            else:
+                pieces.extend(_hard_split(line, max_tokens))
+
+    chunks, current = [], ""
+    for piece in pieces:
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if current and estimate_tokens(candidate) > max_tokens:
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def truncate_middle(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of ``text`` within ``max_tokens``."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    half = max(1, max_tokens // 2)
+    head = _hard_split(text, half)[0]
+    tail = _hard_split(text[::-1], half)[0][::-1]
+    omitted = estimate_tokens(text) - estimate_tokens(head) - estimate_tokens(tail)
+    return f"{head}\n[... about {omitted} tokens omitted ...]\n{tail}"
@@ -0,0 +1,202 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from job_queue import JobQueue
+from llm_helpers import classify_exception, is_retryable
+from modes import MODES, run_mode
+
+logger = logging.getLogger(__name__)
+
+
+def default_llm_factory() -> Any:
+    from HelloAgentsLLM import HelloAgentsLLM
+
+    return HelloAgentsLLM(verbose=False)
+
+
+def _heartbeat(
+    queue: JobQueue, job_id: int, worker_id: str, interval: float, stop: threading.Event
+) -> None:
+    while not stop.wait(interval):
+        if not queue.extend_lease(job_id, worker_id):
+            return
+
+
+def run_worker(
+    queue: JobQueue,
+    llm_factory: Callable[[], Any] = default_llm_factory,
+    worker_id: Optional[str] = None,
+    poll_interval: float = 1.0,
+    exit_when_idle: bool = False,
+    max_jobs: Optional[int] = None,
+    heartbeat_interval: Optional[float] = None,
+) -> int:
+    """Claim and run jobs until idle (optionally) or ``max_jobs``; return jobs processed.
+
+    While a job runs, its lease is renewed every ``heartbeat_interval`` seconds
+    (default: a third of the lease). If the lease is lost anyway, the result
+    cannot be stored and a warning is logged.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    heartbeat_interval = heartbeat_interval or queue.lease_seconds / 3
+    llm = llm_factory()
+    processed = 0
+
+    while max_jobs is None or processed < max_jobs:
+        job = queue.claim(worker_id)
+        if job is None:
+            if exit_when_idle:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=_heartbeat,
+            args=(queue, job["id"], worker_id, heartbeat_interval, stop),
+            daemon=True,
+        )
+        heartbeat.start()
+        try:
+            result = run_mode(llm, job["mode"], job["prompt"], job["options"])
+        except Exception as exc:
+            stored = queue.fail(
+                job["id"],
+                worker_id,
+                f"{exc.__class__.__name__}: {exc}",
+                retryable=is_retryable(classify_exception(exc)),
+            )
+        else:
+            if result.get("ok"):
+                stored = queue.complete(job["id"], worker_id, result)
+            else:
+                error = f"{result.get('error_type')}: {result.get('error_message', '')}"
+                stored = queue.fail(
+                    job["id"],
+                    worker_id,
+                    error,
+                    result,
+                    retryable=is_retryable(result.get("error_type") or "unknown_error"),
+                )
+        finally:
+            stop.set()
+            heartbeat.join()
+        if not stored:
+            logger.warning(
+                "Worker %s lost the lease on job %s; its result was discarded.",
+                worker_id,
+                job["id"],
+            )
+        processed += 1
+
+    return processed
+
+
+def _process_main(
+    path, lease_seconds, max_attempts, llm_factory, index, poll_interval, exit_when_idle
+):
+    queue = JobQueue(path, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{index}"
+    run_worker(
+        queue,
+        llm_factory=llm_factory,
+        worker_id=worker_id,
+        poll_interval=poll_interval,
+        exit_when_idle=exit_when_idle,
+    )
+
+
+def run_pool(
+    path: str,
+    processes: int,
+    lease_seconds: float = 600.0,
+    max_attempts: int = 3,
+    llm_factory: Callable[[], Any] = default_llm_factory,
+    poll_interval: float = 1.0,
+    exit_when_idle: bool = False,
+) -> None:
+    """Run ``processes`` worker processes against the queue at ``path``."""
+    JobQueue(path, lease_seconds=lease_seconds, max_attempts=max_attempts)
+    workers = [
+        multiprocessing.Process(
+            target=_process_main,
+            args=(
+                path,
+                lease_seconds,
+                max_attempts,
+                llm_factory,
+                index,
+                poll_interval,
+                exit_when_idle,
+            ),
+        )
+        for index in range(processes)
+    ]
+    for process in workers:
+        process.start()
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            process.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite-backed evaluation job queue.")
+    parser.add_argument("--db", default="jobs.db")
+    parser.add_argument("--lease-seconds", type=float, default=600.0)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = commands.add_parser("enqueue", help="Add jobs (one prompt per line of --file).")
+    enqueue.add_argument("--mode", choices=MODES, default="basic")
+    enqueue.add_argument("--prompt")
+    enqueue.add_argument("--file")
+    enqueue.add_argument("--options", default="{}", help="JSON object passed to the mode.")
+
+    run = commands.add_parser("run", help="Start worker processes.")
+    run.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    run.add_argument("--poll-interval", type=float, default=1.0)
+    run.add_argument("--exit-when-idle", action="store_true")
+
+    status = commands.add_parser("status", help="Print job counts and throughput.")
+    status.add_argument("--window", type=float, default=60.0)
+
+    args = parser.parse_args()
+    queue = JobQueue(args.db, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+
+    if args.command == "enqueue":
+        options = json.loads(args.options)
+        prompts = [args.prompt] if args.prompt else []
+        if args.file:
+            with open(args.file, "r", encoding="utf-8") as handle:
+                prompts.extend(line.strip() for line in handle if line.strip())
+        ids = queue.enqueue_many(
+            {"mode": args.mode, "prompt": prompt, "options": options} for prompt in prompts
+        )
+        print(f"Enqueued {len(ids)} job(s).")
+    elif args.command == "run":
+        run_pool(
+            args.db,
+            args.processes,
+            lease_seconds=args.lease_seconds,
+            max_attempts=args.max_attempts,
+            poll_interval=args.poll_interval,
+            exit_when_idle=args.exit_when_idle,
+        )
+    else:
+        print(json.dumps(queue.summary(window_seconds=args.window), indent=2))
+
+
+if __name__ == "__main__":
+    main()